@@ -1,59 +1,81 @@
 import numpy as np
-import scipy.stats as stats
 import pandas as pd
-from statsmodels.tsa.stattools import acf
+from scipy.fft import next_fast_len
+from scipy.special import xlogy
+from scipy.stats import chi2
 
 class Backtesting:
     """
     Class for performing backtesting on Value-at-Risk (VaR) calculations.
     """
 
-    def __init__(self, returns, var_results):
+    def __init__(self, returns, var_results, confidence_level=0.95):
         """
         Initialize the Backtesting class.
 
-        :param returns: Daily returns (DataFrame or numpy array).
-        :param var_results: Dictionary of VaR results from different methods.
+        :param returns: Daily portfolio returns (Series, 1D array or single-column DataFrame).
+        :param var_results: Dictionary of VaR results from different methods: a constant VaR,
+                            a result dictionary, or a series of forecasts aligned on the returns
+                            (e.g. the output of `rolling_var`).
+        :param confidence_level: Confidence level of the VaR forecasts.
         """
         self.returns = returns
         self.var_results = var_results
+        self.confidence_level = confidence_level
 
-    def perform_tests(self, var_results):
+    def violations(self, var_results=None):
+        """
+        Séquence des violations (rendement < -VaR) de chaque méthode.
+
+        Une VaR constante est comparée à tous les rendements ; une série de prévisions
+        indexée par date ne l'est qu'aux dates communes avec les rendements.
+        """
+        var_results = self.var_results if var_results is None else var_results
+        returns = self.returns
+        if isinstance(returns, pd.DataFrame):
+            returns = returns.squeeze(axis=1)
+
+        violations = {}
+        for method, values in var_results.items():
+            if isinstance(values, dict):
+                values = values.get("var")
+            if values is None:
+                continue
+            if isinstance(values, pd.Series) and isinstance(returns, pd.Series):
+                index = returns.index.intersection(values.dropna().index)
+                violations[method] = (returns.loc[index] < -values.loc[index]).to_numpy()
+            else:
+                violations[method] = np.asarray(returns, dtype=float) < -np.asarray(values, dtype=float)
+        return violations
+
+    def perform_tests(self, var_results=None):
         """
         Effectue plusieurs tests de backtesting sur la VaR.
+
+        :param var_results: VaR par méthode (par défaut celles passées au constructeur).
+        :return: Dictionnaire des p-values de Kupiec, de Christoffersen et de Hurlin-Tokpavi
+                 par méthode, et du nombre de violations.
         """
         results = {
+            "violations": {},
             "kupiec_p_values": {},
             "christoffersen_p_values": {},
-            "hurlin_tokpavi_p_value": None
+            "hurlin_tokpavi_p_values": {},
         }
 
-        for method, exceptions in var_results.items():
+        for method, exceptions in self.violations(var_results).items():
             sample_size = len(exceptions)
             num_exceptions = np.sum(exceptions)
 
-            results["kupiec_p_values"][method] = self._kupiec_test(sample_size, num_exceptions, 0.95)
+            results["violations"][method] = int(num_exceptions)
+            results["kupiec_p_values"][method] = self._kupiec_test(sample_size, num_exceptions, self.confidence_level)
             results["christoffersen_p_values"][method] = self._christoffersen_independence_test(exceptions)
-
-        results["hurlin_tokpavi_p_value"] = self._hurlin_tokpavi_test(var_results)
+            results["hurlin_tokpavi_p_values"][method] = self._hurlin_tokpavi_test(
+                {self.confidence_level: exceptions}
+            )
 
         return results
 
-    def _count_exceptions(self, var_values):
-        """
-        Count exceptions where returns fall below the negative VaR threshold.
-        """
-        if isinstance(var_values, dict):
-            exceptions = {}
-            for method, values in var_values.items():
-                if isinstance(values, dict):
-                    values = values.get("var", None)
-                if values is not None:
-                    exceptions[method] = np.sum(self.returns < -np.array(values))
-            return exceptions
-        else:
-            return np.sum(self.returns < -np.array(var_values))
-
     def _kupiec_test(self, sample_size, num_exceptions, confidence_level):
         """
         Test de Kupiec pour vérifier si le nombre d'exceptions est conforme au niveau de confiance choisi.
@@ -63,13 +85,26 @@ class Backtesting:
         q = 1 - confidence_level
 
         likelihood_ratio = -2 * (
-                (num_exceptions * np.log(q)) +
-                ((sample_size - num_exceptions) * np.log(1 - q))
+                xlogy(num_exceptions, q) + xlogy(sample_size - num_exceptions, 1 - q)
+                - xlogy(num_exceptions, p_hat) - xlogy(sample_size - num_exceptions, 1 - p_hat)
         )
 
         p_value = chi2.sf(likelihood_ratio, df=1)
         return p_value
 
+    def _hurlin_tokpavi_test(self, violations_by_level, max_lag=None):
+        """
+        Test multivarié basé sur Hurlin & Tokpavi (2007) utilisant la statistique de Portmanteau de Hosking (1980).
+        Vérifie l'absence d'autocorrélation conjointe des violations d'une même méthode
+        à plusieurs niveaux de VaR (ex. 1%, 5%, 10%).
+
+        :param violations_by_level: Dictionnaire {niveau de confiance: séquence de violations}.
+        """
+        levels = np.asarray(list(violations_by_level), dtype=float)
+        violations_matrix = np.column_stack([violations_by_level[level] for level in violations_by_level])
+        _, p_value = hurlin_tokpavi_test(violations_matrix, coverage_rates=1 - levels, max_lag=max_lag)
+        return p_value
+
     def _christoffersen_independence_test(self, exceptions):
         """
         Test de Christoffersen pour vérifier l'indépendance des violations.
@@ -94,19 +129,62 @@ class Backtesting:
         p_value = chi2.sf(likelihood_ratio, df=1)
         return p_value
 
-def _hurlin_tokpavi_test(self, violations_dict):
+
+def cross_correlations(series, max_lag):
+    """
+    Matrices de covariance croisée C_k (k = 0..max_lag) de séries centrées, calculées
+    en une seule passe par FFT pour toutes les paires de colonnes.
+
+    :param series: Matrice (T x m) de séries centrées.
+    :param max_lag: Décalage maximal.
+    :return: np.ndarray (max_lag + 1, m, m) avec C_k[i, j] = sum_t x_i[t + k] x_j[t] / T.
     """
-    Test multivarié basé sur Hurlin & Tokpavi (2007) utilisant la statistique de Portmanteau de Hosking (1980).
-    Vérifie l'absence d'autocorrélation conjointe entre plusieurs niveaux de VaR (1%, 5%, 10%).
+    T = len(series)
+    nfft = next_fast_len(T + max_lag)
+    spectrum = np.fft.rfft(series, n=nfft, axis=0)
+    cross_spectrum = spectrum[:, :, np.newaxis] * np.conj(spectrum[:, np.newaxis, :])
+    return np.fft.irfft(cross_spectrum, n=nfft, axis=0)[: max_lag + 1] / T
+
+
+def hurlin_tokpavi_test(hits, coverage_rates=None, max_lag=None):
     """
-    violations_matrix = np.column_stack([violations_dict[level] for level in violations_dict])
-    max_lag = min(10, len(violations_matrix) // 5)  # Choix pragmatique du nombre de décalages
+    Test multivarié de Hurlin & Tokpavi (2007) : statistique portmanteau de Hosking (1980)
+    sur les séquences de violations à plusieurs niveaux de VaR.
 
-    stat = 0
-    for lag in range(1, max_lag + 1):
-        acf_values = acf(violations_matrix, nlags=lag, fft=True)
-        stat += np.sum(acf_values ** 2)
+    Q = T² sum_k tr(C_k' C_0^-1 C_k C_0^-1) / (T - k), distribuée selon un chi² à
+    max_lag * m² degrés de liberté sous l'hypothèse d'absence d'autocorrélation.
 
-    p_value = chi2.sf(stat, df=max_lag)
-    return p_value
+    :param hits: Matrice (T x m) des violations (0/1), une colonne par niveau de VaR.
+    :param coverage_rates: Taux de couverture théoriques (1 - niveau) par colonne ;
+                           par défaut les fréquences observées.
+    :param max_lag: Nombre de décalages (par défaut min(10, T // 5)).
+    :return: Tuple (statistique, p-value).
 
+    Pour une seule colonne, Q est la statistique de Ljung-Box des violations centrées
+    sur le taux de couverture. Violations alternées, T = 4, un décalage, taux 0.5 :
+    C_0 = 0.25, C_1 = -0.1875, donc Q = 4² (0.1875 / 0.25)² / 3 = 3.
+
+    >>> stat, p_value = hurlin_tokpavi_test([0, 1, 0, 1], coverage_rates=[0.5], max_lag=1)
+    >>> round(float(stat), 10), round(float(p_value), 4)
+    (3.0, 0.0833)
+    """
+    hits = np.asarray(hits, dtype=float)
+    if hits.ndim == 1:
+        hits = hits[:, np.newaxis]
+    T, m = hits.shape
+    if max_lag is None:
+        max_lag = min(10, T // 5)  # Choix pragmatique du nombre de décalages
+
+    centers = hits.mean(axis=0) if coverage_rates is None else np.asarray(coverage_rates, dtype=float)
+    covariances = cross_correlations(hits - centers, max_lag)
+    c0_inv = np.linalg.pinv(covariances[0])
+
+    lags = np.arange(1, max_lag + 1)
+    # tr(C_k' C0^-1 C_k C0^-1) pour tous les décalages à la fois
+    left = np.einsum("kji,jl->kil", covariances[1:], c0_inv)
+    right = np.einsum("kij,jl->kil", covariances[1:], c0_inv)
+    traces = np.einsum("kil,kli->k", left, right)
+
+    stat = T ** 2 * np.sum(traces / (T - lags))
+    p_value = chi2.sf(stat, df=max_lag * m ** 2)
+    return stat, p_value
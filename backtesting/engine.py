@@ -0,0 +1,304 @@
+import numpy as np
+import pandas as pd
+from scipy.special import xlogy
+from scipy.stats import chi2
+
+from .backtesting import hurlin_tokpavi_test
+
+
+def kupiec_lr(n, x, q):
+    """
+    Statistique du ratio de vraisemblance de Kupiec (POF), élément par élément.
+    """
+    p_hat = x / n
+    log_null = xlogy(n - x, 1 - q) + xlogy(x, q)
+    log_alt = xlogy(n - x, 1 - p_hat) + xlogy(x, p_hat)
+    return -2 * (log_null - log_alt)
+
+
+def transition_counts(violations):
+    """
+    Comptes de transitions (n00, n01, n10, n11) entre jours consécutifs, par colonne.
+    """
+    previous, current = violations[:-1], violations[1:]
+    n1_ = previous.sum(axis=0)
+    n11 = (previous & current).sum(axis=0)
+    n_1 = current.sum(axis=0)
+    n01 = n_1 - n11
+    n10 = n1_ - n11
+    n00 = len(previous) - n1_ - n01
+    return np.stack([n00, n01, n10, n11])
+
+
+def christoffersen_lr(transitions):
+    """
+    Statistique d'indépendance de Christoffersen à partir des comptes de transitions
+    (n00, n01, n10, n11), élément par élément.
+    """
+    n00, n01, n10, n11 = transitions
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pi0 = np.where(n00 + n01 > 0, n01 / (n00 + n01), 0.0)
+        pi1 = np.where(n10 + n11 > 0, n11 / (n10 + n11), 0.0)
+        pi = (n01 + n11) / (n00 + n01 + n10 + n11)
+
+    log_null = xlogy(n00 + n10, 1 - pi) + xlogy(n01 + n11, pi)
+    log_alt = xlogy(n00, 1 - pi0) + xlogy(n01, pi0) + xlogy(n10, 1 - pi1) + xlogy(n11, pi1)
+    return -2 * (log_null - log_alt)
+
+
+def coverage_table(methods, confidence_levels, n, x, transitions):
+    """
+    Tests de couverture (Kupiec, indépendance, couverture conditionnelle) à partir des
+    seuls comptes : nombre de jours, violations et transitions par (méthode, niveau).
+
+    :return: DataFrame indexé par (method, confidence_level).
+    """
+    confidence_levels = np.asarray(confidence_levels, dtype=float)
+    q = 1 - confidence_levels[np.newaxis, :]
+
+    kupiec = kupiec_lr(n, x, q)
+    independence = christoffersen_lr(transitions)
+    conditional = kupiec + independence
+
+    index = pd.MultiIndex.from_product([list(methods), confidence_levels], names=["method", "confidence_level"])
+    columns = {
+        "violations": x,
+        "expected_violations": np.broadcast_to(n * q, x.shape),
+        "violation_rate": x / n,
+        "kupiec_lr": kupiec,
+        "kupiec_p_value": chi2.sf(kupiec, df=1),
+        "independence_lr": independence,
+        "independence_p_value": chi2.sf(independence, df=1),
+        "conditional_coverage_lr": conditional,
+        "conditional_coverage_p_value": chi2.sf(conditional, df=2),
+    }
+    return pd.DataFrame({name: np.ravel(values) for name, values in columns.items()}, index=index)
+
+
+# Fenêtre d'estimation minimale des prévisions backtestées
+MIN_BACKTEST_WINDOW = 20
+
+
+def backtest_window(n_obs, window):
+    """
+    Fenêtre d'estimation plafonnée à la moitié de l'échantillon, pour qu'au moins autant
+    de jours soient backtestés que d'observations servent à l'estimation.
+
+    :param n_obs: Nombre de rendements disponibles.
+    :param window: Fenêtre demandée.
+    :return: Fenêtre effective.
+    """
+    effective = min(int(window), n_obs // 2)
+    if effective < MIN_BACKTEST_WINDOW:
+        raise ValueError(
+            f"Pas assez d'observations pour le backtesting : {n_obs} rendements, il en faut "
+            f"au moins {2 * MIN_BACKTEST_WINDOW}."
+        )
+    return effective
+
+
+def rolling_forecasts(var_methods, window, step=1):
+    """
+    Prévisions de VaR glissantes (`backtest_forecasts`) de chaque méthode et rendements
+    réalisés du portefeuille, prêts pour `BacktestEngine.from_forecasts`.
+
+    :param var_methods: Dictionnaire {méthode: instance BaseVaRMethod} sur les mêmes rendements.
+    :param window: Nombre d'observations par fenêtre d'estimation, plafonné à la moitié
+                   de l'échantillon (voir `backtest_window`).
+    :param step: Pas (en observations) entre deux prévisions.
+    :return: Tuple (rendements, {méthode: prévisions}, {méthode: erreur}). Les prévisions sont
+             nommées d'après leur niveau de confiance ; les méthodes sans prévision glissante
+             (ex. Optimal-VaR) sont reportées dans les erreurs.
+    :raises ValueError: Échantillon trop court pour être backtesté.
+    """
+    returns, forecasts, errors = None, {}, {}
+    for name, method in var_methods.items():
+        if returns is None:
+            method.validate_inputs()
+            values = method.portfolio_returns.to_numpy(dtype=float)
+            index = method.index if method.index is not None else pd.RangeIndex(len(values))
+            returns = pd.Series(values, index=index)
+            window = backtest_window(len(values), window)
+
+        try:
+            forecasts[name] = method.backtest_forecasts(window, step).rename(method.confidence_level)
+        except Exception as e:
+            errors[name] = e
+    return returns, forecasts, errors
+
+
+class BacktestEngine:
+    """
+    Backtesting vectorisé des prévisions de VaR sur méthodes x niveaux de confiance.
+
+    Le tenseur des violations (jours x méthodes x niveaux) est calculé une fois ; les
+    statistiques de Kupiec, d'indépendance de Christoffersen et de couverture
+    conditionnelle sont ensuite obtenues pour chaque colonne (méthode, niveau) par
+    opérations vectorisées uniquement.
+    """
+
+    def __init__(self, returns, var_forecasts, methods, confidence_levels):
+        """
+        :param returns: Rendements réalisés du portefeuille, de forme (jours,).
+        :param var_forecasts: Prévisions de VaR positives, de forme (jours, méthodes, niveaux)
+                              ou (jours, méthodes) pour un seul niveau.
+        :param methods: Noms des méthodes, un par colonne de prévisions.
+        :param confidence_levels: Niveaux de confiance, un par colonne de niveaux.
+        """
+        returns = np.asarray(returns, dtype=float)
+        var_forecasts = np.asarray(var_forecasts, dtype=float)
+        if var_forecasts.ndim == 2:
+            var_forecasts = var_forecasts[:, :, np.newaxis]
+
+        if var_forecasts.shape != (len(returns), len(methods), len(confidence_levels)):
+            raise ValueError(
+                f"Les prévisions de VaR de forme {var_forecasts.shape} ne correspondent pas à "
+                f"{len(returns)} jours x {len(methods)} méthodes x {len(confidence_levels)} niveaux."
+            )
+
+        self.returns = returns
+        self.var_forecasts = var_forecasts
+        self.methods = list(methods)
+        self.confidence_levels = np.asarray(confidence_levels, dtype=float)
+        self.violations = returns[:, np.newaxis, np.newaxis] < -var_forecasts
+
+    @classmethod
+    def from_forecasts(cls, returns, forecasts):
+        """
+        Construit le moteur à partir de prévisions indexées par date, par exemple celles
+        de `rolling_var` (voir `rolling_forecasts`).
+
+        :param returns: pd.Series des rendements réalisés.
+        :param forecasts: Dictionnaire {méthode: DataFrame indexé par date, une colonne par
+                          niveau de confiance} (une Series est traitée comme un seul niveau).
+        """
+        forecasts = {
+            method: frame.to_frame() if isinstance(frame, pd.Series) else frame
+            for method, frame in forecasts.items()
+        }
+        frames = list(forecasts.values())
+        levels = list(frames[0].columns)
+
+        # Seuls les jours où toutes les prévisions et le rendement réalisé sont disponibles
+        index = returns.dropna().index
+        for frame in frames:
+            index = index.intersection(frame.dropna().index)
+
+        tensor = np.stack([frame.loc[index, levels].to_numpy() for frame in frames], axis=1)
+        return cls(returns.loc[index].to_numpy(), tensor, list(forecasts), levels)
+
+    def run(self):
+        """
+        Exécute tous les tests pour chaque couple (méthode, niveau).
+
+        :return: DataFrame indexé par (method, confidence_level).
+        """
+        return coverage_table(
+            self.methods, self.confidence_levels, len(self.returns),
+            self.violations.sum(axis=0), transition_counts(self.violations),
+        )
+
+    def hurlin_tokpavi(self, max_lag=None):
+        """
+        Test multivarié de Hurlin & Tokpavi de chaque méthode sur l'ensemble de ses niveaux.
+
+        :return: DataFrame indexé par méthode (statistique et p-value).
+        """
+        coverage_rates = 1 - self.confidence_levels
+        results = [
+            hurlin_tokpavi_test(self.violations[:, i, :], coverage_rates, max_lag)
+            for i in range(len(self.methods))
+        ]
+        return pd.DataFrame(results, index=pd.Index(self.methods, name="method"),
+                            columns=["hurlin_tokpavi_stat", "hurlin_tokpavi_p_value"])
+
+    def rank(self, by="conditional_coverage_p_value"):
+        """
+        Classe les méthodes pour chaque niveau de confiance (1 = meilleure p-value).
+
+        :return: DataFrame (méthodes x niveaux) des rangs.
+        """
+        scores = self.run()[by].unstack("confidence_level")
+        return scores.rank(ascending=False, method="min").astype(int)
+
+
+class IncrementalBacktest:
+    """
+    Backtesting tenu à jour un jour à la fois.
+
+    Seuls les comptes sont conservés (jours, violations et transitions par méthode et
+    par niveau) : l'ajout d'un jour les prolonge en O(méthodes x niveaux), sans
+    recompter l'historique. `run` donne les mêmes statistiques que BacktestEngine.
+    """
+
+    def __init__(self, methods, confidence_levels):
+        """
+        :param methods: Noms des méthodes, un par colonne de prévisions.
+        :param confidence_levels: Niveaux de confiance, un par colonne de niveaux.
+        """
+        self.methods = list(methods)
+        self.confidence_levels = np.asarray(confidence_levels, dtype=float)
+        shape = (len(self.methods), len(self.confidence_levels))
+        self.n = 0
+        self.violations = np.zeros(shape, dtype=np.int64)
+        self.transitions = np.zeros((4,) + shape, dtype=np.int64)
+        self.last_hits = None
+
+    @classmethod
+    def from_engine(cls, engine):
+        """
+        Part des comptes d'un backtesting vectorisé (ex. sur un historique de VaR glissantes).
+        """
+        backtest = cls(engine.methods, engine.confidence_levels)
+        backtest.n = len(engine.returns)
+        backtest.violations = engine.violations.sum(axis=0).astype(np.int64)
+        if backtest.n > 1:
+            backtest.transitions = transition_counts(engine.violations).astype(np.int64)
+        if backtest.n:
+            backtest.last_hits = engine.violations[-1].copy()
+        return backtest
+
+    def update(self, return_, var_forecasts):
+        """
+        Prolonge les comptes d'un rendement réalisé.
+
+        :param return_: Rendement réalisé du portefeuille sur la journée.
+        :param var_forecasts: Prévisions de VaR positives pour cette journée, de forme
+                              (méthodes, niveaux) ou (méthodes,) pour un seul niveau.
+        :return: Violations (booléens) de la journée, de forme (méthodes, niveaux).
+        """
+        var_forecasts = np.asarray(var_forecasts, dtype=float).reshape(self.violations.shape)
+        hits = return_ < -var_forecasts
+        self.n += 1
+        self.violations += hits
+        if self.last_hits is not None:
+            # Lignes de `transitions` : n00, n01, n10, n11
+            np.add.at(self.transitions, (2 * self.last_hits + hits,) + tuple(np.indices(hits.shape)), 1)
+        self.last_hits = hits
+        return hits
+
+    def run(self):
+        """
+        :return: DataFrame indexé par (method, confidence_level), comme BacktestEngine.run.
+        """
+        return coverage_table(self.methods, self.confidence_levels, self.n, self.violations, self.transitions)
+
+    def to_dict(self):
+        return {
+            "methods": self.methods,
+            "confidence_levels": self.confidence_levels.tolist(),
+            "n": self.n,
+            "violations": self.violations.tolist(),
+            "transitions": self.transitions.tolist(),
+            "last_hits": None if self.last_hits is None else self.last_hits.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        backtest = cls(state["methods"], state["confidence_levels"])
+        backtest.n = state["n"]
+        backtest.violations = np.asarray(state["violations"], dtype=np.int64)
+        backtest.transitions = np.asarray(state["transitions"], dtype=np.int64)
+        if state["last_hits"] is not None:
+            backtest.last_hits = np.asarray(state["last_hits"], dtype=bool)
+        return backtest
@@ -0,0 +1,266 @@
+"""
+Headless batch runner: computes VaR for every portfolio of a JSON job file.
+
+    python batch_runner.py jobs.json --output-dir results/nightly --workers 8
+
+Job file layout (keys of "defaults" can be overridden by each job):
+
+    {
+        "cache_dir": ".var_cache",
+        "result_cache": ".var_cache/results.sqlite",
+        "offline": false,
+        "source": {"type": "yahoo"},
+        "defaults": {
+            "start_date": "2020-01-01",
+            "end_date": "2024-12-31",
+            "confidence_levels": [0.95, 0.99],
+            "methods": ["Historical", "Variance-Covariance", "GARCH"]
+        },
+        "jobs": [
+            {"name": "cac40_equal", "assets": ["AIR.PA", "BNP.PA", "OR.PA"]},
+            {"name": "cac40_tilted", "assets": ["AIR.PA", "BNP.PA"], "weights": [0.7, 0.3]}
+        ]
+    }
+
+Writes `var_results.csv` (one row per job, method and level) and `jobs.json`
+(status, duration, failures and per-stage/per-method timings of every job) into
+the output directory. With a result cache (optional), methods already computed on
+identical returns and parameters are read back instead of recomputed. With
+--reports-dir, each worker also writes the Excel report of its jobs, named
+VaR_Report_<job>_<date>[_n].xlsx.
+Never imports tkinter: the GUI entry point stays in main.py.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+
+import pandas as pd
+
+from data.data_collector import DataCollector
+from data.sources import DirectorySource, FileSource, YahooFinanceSource
+from main import VaRController
+from methods.executor import MethodExecutor
+from monitoring.instrumentation import Instrumentation
+from monitoring.logging_setup import configure_logging
+from results.report_generator import reserve_report_path
+
+SOURCES = {"yahoo": YahooFinanceSource, "file": FileSource, "directory": DirectorySource}
+JOB_KEYS = ("name", "assets", "weights", "start_date", "end_date", "confidence_levels", "methods")
+
+
+def build_source(spec):
+    """
+    Instantiate a data source from its job-file description, e.g. {"type": "file", "path": "prices.parquet"}.
+    """
+    spec = dict(spec or {"type": "yahoo"})
+    source_type = spec.pop("type", "yahoo")
+    if source_type not in SOURCES:
+        raise ValueError(f"Unknown source type: {source_type}. Choose from {list(SOURCES)}.")
+    return SOURCES[source_type](**spec)
+
+
+def load_jobs(path):
+    """
+    Read a job file and return (settings, jobs) with the defaults merged into every job.
+    """
+    with open(path, encoding="utf-8") as handle:
+        config = json.load(handle)
+
+    defaults = config.get("defaults", {})
+    jobs = []
+    for position, job in enumerate(config.get("jobs", [])):
+        job = {**defaults, **job}
+        job.setdefault("name", f"job_{position}")
+        missing = [key for key in ("assets", "start_date", "end_date", "confidence_levels", "methods")
+                   if key not in job]
+        if missing:
+            raise ValueError(f"Job {job['name']} is missing {missing}.")
+        jobs.append({key: job.get(key) for key in JOB_KEYS})
+
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Job names must be unique.")
+
+    settings = {
+        "cache_dir": config.get("cache_dir", ".var_cache"),
+        "result_cache": config.get("result_cache"),
+        "offline": config.get("offline", False),
+        "source": config.get("source"),
+    }
+    return settings, jobs
+
+
+def prefetch(settings, jobs):
+    """
+    Fill the shared price cache once per date range with the union of the tickers,
+    so that workers read their prices from disk instead of each calling the provider.
+
+    :return: Dictionary {(start_date, end_date): error message} of failed prefetches.
+    """
+    ranges = {}
+    for job in jobs:
+        ranges.setdefault((job["start_date"], job["end_date"]), set()).update(job["assets"])
+
+    failures = {}
+    for (start_date, end_date), assets in ranges.items():
+        collector = DataCollector(settings["cache_dir"], settings["offline"], build_source(settings["source"]))
+        try:
+            collector.set_parameters(start_date, end_date, sorted(assets))
+            collector.fetch_data()
+        except Exception as error:
+            # Each job retries (or fails) on its own tickers
+            failures[(start_date, end_date)] = str(error)
+    return failures
+
+
+def run_job(job, settings):
+    """
+    Compute the VaR of one portfolio at every requested level (module-level for worker processes).
+
+    :return: Dictionary with the job status, its result rows and per-method failures.
+    """
+    started = time.perf_counter()
+    outcome = {"name": job["name"], "status": "ok", "rows": [], "errors": {}, "timings": []}
+    controller = VaRController()
+    controller.instrumentation = Instrumentation(trace_memory=settings.get("trace_memory", False))
+    try:
+        controller.cache_dir = settings["cache_dir"]
+        controller.result_cache_path = settings.get("result_cache")
+        controller.offline = settings["offline"]
+        controller.data_source = build_source(settings["source"])
+        controller.start_date = job["start_date"]
+        controller.end_date = job["end_date"]
+        controller.assets = list(job["assets"])
+        controller.weights = job["weights"]
+        controller.confidence_level = job["confidence_levels"][0]
+        controller.selected_methods = list(job["methods"])
+        # Jobs are already spread over the pool: methods of one job run sequentially
+        controller.max_workers = 1
+
+        unknown = set(controller.selected_methods) - set(VaRController.METHOD_CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown methods: {sorted(unknown)}")
+
+        controller.fetch_data()
+        controller.initialize_var_methods()
+        # Methods without a multi-level pass (e.g. Optimal-VaR) run once per level
+        results = controller.calculate_var_levels(job["confidence_levels"], per_level_fallback=True)
+
+        for method, levels in results.items():
+            for confidence_level, var in zip(levels["confidence_level"], levels["var"]):
+                outcome["rows"].append({
+                    "job": job["name"],
+                    "method": method,
+                    "confidence_level": float(confidence_level),
+                    "var": float(var),
+                })
+        outcome["errors"] = {method: repr(error) for method, error in controller.var_errors.items()}
+
+        if settings.get("reports_dir") and results:
+            # Report at the first requested level, rendered in this worker
+            controller.var_results = {method: float(levels["var"][0]) for method, levels in results.items()}
+            controller.report_filename = reserve_report_path(
+                settings["reports_dir"], f"VaR_Report_{job['name']}_{datetime.date.today()}"
+            )
+            outcome["report"] = controller.generate_reports()
+        if outcome["errors"]:
+            outcome["status"] = "partial" if outcome["rows"] else "failed"
+    except Exception as error:
+        outcome["status"] = "failed"
+        outcome["errors"] = {"job": repr(error)}
+
+    outcome["seconds"] = round(time.perf_counter() - started, 3)
+    outcome["timings"] = controller.instrumentation.report()["records"]
+    controller.instrumentation.stop()
+    return outcome
+
+
+def run_batch(jobs, settings, max_workers=None, backend="process"):
+    """
+    Run all jobs on a worker pool and yield each outcome as soon as it completes.
+
+    Workers share the on-disk price cache; within a worker process, fitted GARCH
+    models are reused across jobs through the process-wide model cache.
+    """
+    if backend not in MethodExecutor.BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Choose from {list(MethodExecutor.BACKENDS)}.")
+
+    with MethodExecutor.BACKENDS[backend](max_workers=max_workers) as pool:
+        futures = [pool.submit(run_job, job, settings) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def write_outputs(outcomes, output_dir):
+    """
+    Write the long result table (CSV) and the per-job status report (JSON).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rows = [row for outcome in outcomes for row in outcome["rows"]]
+    pd.DataFrame(rows, columns=["job", "method", "confidence_level", "var"]).to_csv(
+        os.path.join(output_dir, "var_results.csv"), index=False
+    )
+
+    status = [
+        {key: outcome.get(key) for key in ("name", "status", "seconds", "report", "errors", "timings")}
+        for outcome in outcomes
+    ]
+    with open(os.path.join(output_dir, "jobs.json"), "w", encoding="utf-8") as handle:
+        json.dump(status, handle, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute VaR for every portfolio of a job file.")
+    parser.add_argument("job_file", help="JSON job file.")
+    parser.add_argument("--output-dir", default="batch_results", help="Directory of the result files.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of workers (default: CPU count).")
+    parser.add_argument("--backend", choices=sorted(MethodExecutor.BACKENDS), default="process",
+                        help="Worker pool type.")
+    parser.add_argument("--cache-dir", default=None, help="Override the price cache directory.")
+    parser.add_argument("--result-cache", default=None, help="SQLite file memoizing VaR results across runs.")
+    parser.add_argument("--offline", action="store_true", help="Never access the network.")
+    parser.add_argument("--reports-dir", default=None, help="Also write one Excel report per job here.")
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak memory per stage and method.")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level (DEBUG, INFO, WARNING, ...).")
+    parser.add_argument("--json-logs", action="store_true", help="Emit structured JSON log lines.")
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level, structured=args.json_logs)
+
+    settings, jobs = load_jobs(args.job_file)
+    if args.cache_dir:
+        settings["cache_dir"] = args.cache_dir
+    if args.result_cache:
+        settings["result_cache"] = args.result_cache
+    if args.offline:
+        settings["offline"] = True
+    settings["trace_memory"] = args.trace_memory
+    settings["reports_dir"] = args.reports_dir
+
+    for (start_date, end_date), error in prefetch(settings, jobs).items():
+        print(f"Prefetch failed for {start_date} - {end_date}: {error}", file=sys.stderr)
+
+    outcomes = []
+    for outcome in run_batch(jobs, settings, args.workers, args.backend):
+        outcomes.append(outcome)
+        print(f"[{len(outcomes)}/{len(jobs)}] {outcome['name']}: {outcome['status']} ({outcome['seconds']} s)")
+        for method, error in outcome["errors"].items():
+            print(f"    {method}: {error}", file=sys.stderr)
+
+    # Report jobs in job-file order, whatever their completion order
+    order = {job["name"]: position for position, job in enumerate(jobs)}
+    outcomes.sort(key=lambda outcome: order[outcome["name"]])
+    write_outputs(outcomes, args.output_dir)
+
+    failed = sum(outcome["status"] != "ok" for outcome in outcomes)
+    print(f"{len(jobs) - failed}/{len(jobs)} jobs succeeded. Results written to {args.output_dir}.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Startup benchmark: time a fresh interpreter for each scenario (median of several runs).
+
+    python benchmarks/import_time.py --repeat 5
+
+Scenarios:
+- import main: controller import only, as done by batch_runner.py.
+- headless Historical: import main, compute a Historical-only VaR, with no heavy
+  optional dependency (arch, scipy.stats, matplotlib, yfinance, tkinter) loaded.
+- all methods: force every method module to load, i.e. the former eager imports.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("arch", "scipy.stats", "matplotlib", "yfinance", "tkinter", "xlsxwriter")
+
+SCENARIOS = {
+    "import main": "import main",
+    "headless Historical": f"""
+import sys
+import numpy as np
+import pandas as pd
+import main
+
+controller = main.VaRController()
+controller.returns = pd.DataFrame(np.random.default_rng(0).standard_normal((2500, 40)) * 0.01)
+controller.confidence_level = 0.95
+controller.selected_methods = ["Historical"]
+controller.max_workers = 1
+controller.initialize_var_methods()
+controller.calculate_var()
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+assert not loaded, f"heavy modules loaded: {{loaded}}"
+""",
+    "all methods": """
+import methods
+for name in methods.method_registry:
+    methods.method_registry[name]
+""",
+}
+
+
+def time_scenario(code, repeat):
+    """
+    Median wall time (seconds) of `python -c code` over `repeat` fresh interpreters.
+    """
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure interpreter startup and import time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario.")
+    args = parser.parse_args(argv)
+
+    baseline = time_scenario("pass", args.repeat)
+    print(f"{'scenario':<22}{'median (s)':>12}{'minus bare python (s)':>24}")
+    for name, code in SCENARIOS.items():
+        elapsed = time_scenario(code, args.repeat)
+        print(f"{name:<22}{elapsed:>12.3f}{elapsed - baseline:>24.3f}")
+
+
+if __name__ == "__main__":
+    main()
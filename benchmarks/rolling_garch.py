@@ -0,0 +1,66 @@
+"""
+Rolling GARCH VaR check: `GARCHVaR.rolling_var` against one independent GARCH fit per window.
+
+    python benchmarks/rolling_garch.py --days 600 --window 250
+
+Every window must give the VaR of a GARCH(1,1) fitted on that window alone (arch's own
+starting values). The script fails if any forecast differs from the naive per-window fit,
+then prints both timings.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+from arch import arch_model
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from methods.garch_var import GARCHVaR  # noqa: E402
+
+
+def naive_rolling_var(values, window, confidence_level):
+    var = []
+    for sample in sliding_window_view(values[:-1], window):
+        fitted_model = arch_model(sample, p=1, q=1).fit(disp="off")
+        volatility = np.sqrt(fitted_model.forecast(horizon=1).variance.values[-1, 0])
+        var.append(abs(np.percentile(sample, (1 - confidence_level) * 100)) * volatility)
+    return np.asarray(var)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check rolling GARCH VaR against per-window fits.")
+    parser.add_argument("--days", type=int, default=600, help="Length of the return series.")
+    parser.add_argument("--window", type=int, default=250, help="Estimation window.")
+    parser.add_argument("--confidence-level", type=float, default=0.95, help="VaR confidence level.")
+    args = parser.parse_args(argv)
+
+    # arch warns about the scale of daily returns and about some cold fits
+    warnings.simplefilter("ignore")
+    values = np.random.default_rng(0).standard_t(5, size=args.days) * 0.01
+
+    started = time.perf_counter()
+    rolling = GARCHVaR(values, args.confidence_level).rolling_var(args.window).to_numpy()
+    rolling_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    naive = naive_rolling_var(values, args.window, args.confidence_level)
+    naive_time = time.perf_counter() - started
+
+    deviation = np.abs(rolling / naive - 1)
+    if not np.allclose(rolling, naive, rtol=1e-9, atol=0):
+        raise AssertionError(
+            f"rolling GARCH VaR disagrees with per-window fits: median relative deviation "
+            f"{np.median(deviation):.3g}, max {deviation.max():.3g}"
+        )
+
+    print(f"{len(naive)} windows of {args.window} days, max relative deviation {deviation.max():.2g}")
+    print(f"rolling_var: {rolling_time:.2f} s, per-window fits: {naive_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Rolling Historical and TVE VaR benchmark: sliding sorted window versus per-window sorting.
+
+    python benchmarks/rolling_order_statistics.py --days 5000 --windows 50 250 1000 --repeat 5
+
+Strategies, for every window size:
+- naive sort: one np.sort per window (the former approach).
+- partition: np.partition of every window at once on a sliding view (vectorized selection).
+- sliding window: one sorted buffer updated by bisect insert/delete, with the sum of
+  the worst returns maintained alongside (`methods.online.rolling_order_statistics`).
+
+Each strategy computes both the rolling VaR and the rolling mean of the worst returns;
+results are checked against the naive sort before being timed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from methods.online import rolling_order_statistics  # noqa: E402
+
+
+def naive_sort(values, window, rank, tail_size):
+    var, tail = [], []
+    for start in range(len(values) - window + 1):
+        ordered = np.sort(values[start:start + window])
+        var.append(ordered[rank])
+        tail.append(ordered[:tail_size].mean())
+    return np.asarray(var), np.asarray(tail)
+
+
+def partition(values, window, rank, tail_size):
+    windows = sliding_window_view(values, window)
+    var = np.partition(windows, rank, axis=1)[:, rank]
+    tail = np.partition(windows, tail_size, axis=1)[:, :tail_size].mean(axis=1)
+    return var, tail
+
+
+def sliding(values, window, rank, tail_size):
+    return rolling_order_statistics(values, window, rank, tail_size)
+
+
+STRATEGIES = {"naive sort": naive_sort, "partition": partition, "sliding window": sliding}
+
+
+def median_time(function, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare rolling order-statistics strategies.")
+    parser.add_argument("--days", type=int, default=5000, help="Length of the return series.")
+    parser.add_argument("--windows", type=int, nargs="+", default=[50, 250, 1000], help="Window sizes.")
+    parser.add_argument("--confidence-level", type=float, default=0.99, help="VaR confidence level.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per strategy.")
+    args = parser.parse_args(argv)
+
+    values = np.random.default_rng(0).standard_t(4, size=args.days) * 0.01
+
+    print(f"{'window':>8}" + "".join(f"{name + ' (s)':>22}" for name in STRATEGIES))
+    for window in args.windows:
+        rank = int((1 - args.confidence_level) * window)
+        tail_size = max(rank, 1)
+        expected = naive_sort(values, window, rank, tail_size)
+        for name, function in STRATEGIES.items():
+            var, tail = function(values, window, rank, tail_size)
+            if not (np.allclose(var, expected[0]) and np.allclose(tail, expected[1])):
+                raise AssertionError(f"{name} disagrees with the naive sort for window {window}")
+
+        timings = [median_time(function, args.repeat, values, window, rank, tail_size)
+                   for function in STRATEGIES.values()]
+        print(f"{window:>8}" + "".join(f"{timing:>22.4f}" for timing in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
-import yfinance as yf
+import logging
 import pandas as pd
-from datetime import datetime
+
+from .price_cache import PriceCache
+from .sources import YahooFinanceSource
+
+logger = logging.getLogger(__name__)
 
 class DataCollector:
     """
     Class for collecting financial data for a portfolio of assets.
     """
-    def __init__(self):
+    def __init__(self, cache_dir=None, offline=False, source=None):
         """
         Initialize the DataCollector with empty attributes.
+
+        :param cache_dir: Directory of the persistent price cache (no cache if None).
+        :param offline: Never access the network; serve data from the cache and local sources only
+                        (ranges missing from the cache are skipped with a warning).
+        :param source: Price provider (a DataSource, Yahoo Finance by default).
         """
         self.start_date = None
         self.end_date = None
         self.assets = []  # ✅ No default assets
         self.data = None
+        self.cache = PriceCache(cache_dir) if cache_dir else None
+        self.offline = offline
+        self.source = source if source is not None else YahooFinanceSource()
 
     def set_parameters(self, start_date, end_date, assets):
         """
@@ -32,24 +44,61 @@ class DataCollector:
 
     def fetch_data(self):
         """
-        Fetch data from Yahoo Finance.
+        Fetch data from the configured source (Yahoo Finance by default).
+
+        With a cache, only the date ranges not already on disk are fetched.
         """
         if not self.assets:
             raise ValueError("No assets specified. Call `set_parameters()` first.")
 
-        try:
-            data = yf.download(self.assets, start=self.start_date, end=self.end_date, progress=False)
-            print(f"Fetched data index: {data.index}")  # ✅ Debugging
-            print(f"Available columns: {data.columns}")
-
-            if "Adj Close" in data.columns:
-                self.data = data["Adj Close"].dropna(how="all")
-            elif "Close" in data.columns:
-                self.data = data["Close"].dropna(how="all")
-            else:
-                raise KeyError("Neither 'Adj Close' nor 'Close' columns are present.")
-        except Exception as e:
-            raise ConnectionError(f"Failed to fetch data: {e}")
+        if self.cache is not None:
+            self.data = self._fetch_cached()
+        else:
+            self.data = self._fetch_source(self.assets, self.start_date, self.end_date).dropna(how="all")
+
+    def _fetch_source(self, tickers, start, end):
+        """
+        Closing prices of `tickers` within [start, end) from the configured source.
+        """
+        if self.offline and self.source.remote:
+            raise ConnectionError(f"Offline mode: no cached or local data for {tickers} from {start} to {end}.")
+        return self.source.fetch(tickers, start, end)
+
+    def _fetch_cached(self):
+        """
+        Serve prices from the on-disk cache, fetching and merging only the missing ranges.
+        """
+        # Tickers sharing the same missing range are fetched in a single request
+        requests = {}
+        for ticker in self.assets:
+            for date_range in self.cache.missing_ranges(ticker, self.start_date, self.end_date):
+                requests.setdefault(date_range, []).append(ticker)
+
+        for (start, end), tickers in requests.items():
+            if self.offline and self.source.remote:
+                logger.warning("Offline mode: %s not cached from %s to %s, serving cached prices only",
+                               tickers, start, end)
+                continue
+            fetched = self._fetch_source(tickers, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+            for ticker in tickers:
+                prices = fetched[ticker] if ticker in fetched.columns else pd.Series(dtype=float)
+                if prices.dropna().empty:
+                    # Not marked as covered if the range has trading days: requested again next time
+                    logger.warning("No prices returned for %s from %s to %s", ticker, start, end)
+                self.cache.store(ticker, prices, start, end)
+
+        data = {}
+        for ticker in self.assets:
+            prices = self.cache.load(ticker, self.start_date, self.end_date)
+            if prices is None or prices.empty:
+                if self.offline and self.source.remote:
+                    raise ConnectionError(
+                        f"Offline mode: no cached prices for {ticker} from {self.start_date} to {self.end_date}."
+                    )
+                prices = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+            data[ticker] = prices
+        data = pd.DataFrame(data)
+        return data.dropna(how="all")
 
     def calculate_returns(self):
         """
@@ -58,17 +107,22 @@ class DataCollector:
         if self.data is None:
             raise ValueError("No data available. Please fetch data first using `fetch_data`.")
 
-        print(f"Raw data before calculating returns:\n{self.data}")  # ✅ Debugging step
         returns = self.data.pct_change().dropna()
-        print(f"Calculated returns:\n{returns}")  # ✅ Debugging step
+        logger.debug(
+            "Calculated returns",
+            extra={"prices_shape": self.data.shape, "returns_shape": returns.shape},
+        )
         return returns
 
     def save_data(self, file_path: str):
         """
-        Save the collected data to a CSV file.
+        Save the collected data to a CSV file (or Parquet, for a .parquet path).
         """
         if self.data is None:
             raise ValueError("No data available to save. Please fetch data first using `fetch_data`.")
 
-        self.data.to_csv(file_path)
-        print(f"Data saved to {file_path}")
\ No newline at end of file
+        if file_path.endswith(".parquet"):
+            self.data.to_parquet(file_path)
+        else:
+            self.data.to_csv(file_path)
+        logger.info("Data saved to %s", file_path)
\ No newline at end of file
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class PriceCache:
+    """
+    Persistent on-disk cache of closing prices, one Parquet file per ticker.
+
+    Each ticker also records the date range [start, end) already requested from the
+    provider, so that only the missing part of a new range has to be fetched. Ranges
+    never extend past today: the current day, not closed yet, is never cached as covered.
+    """
+
+    COVERAGE_FILE = "coverage.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, cache_dir):
+        """
+        :param cache_dir: Directory holding the Parquet files and the coverage index.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._coverage = self._read_coverage()
+
+    def _read_coverage(self):
+        path = os.path.join(self.cache_dir, self.COVERAGE_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return {ticker: tuple(pd.Timestamp(d) for d in span) for ticker, span in json.load(f).items()}
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Exclusive lock shared by every process using this cache directory.
+        """
+        with open(os.path.join(self.cache_dir, self.LOCK_FILE), "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_coverage(self):
+        path = os.path.join(self.cache_dir, self.COVERAGE_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        coverage = {
+            ticker: [start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")]
+            for ticker, (start, end) in self._coverage.items()
+        }
+        with open(tmp_path, "w") as f:
+            json.dump(coverage, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker.replace(os.sep, '_')}.parquet")
+
+    @staticmethod
+    def _today():
+        return pd.Timestamp.today().normalize()
+
+    def missing_ranges(self, ticker, start, end):
+        """
+        Date ranges [start, end) not yet covered by the cache for this ticker, up to today
+        (future dates have no prices to fetch).
+        """
+        start, end = pd.Timestamp(start), min(pd.Timestamp(end), self._today())
+        if start >= end:
+            return []
+        if ticker not in self._coverage:
+            return [(start, end)]
+
+        covered_start, covered_end = self._coverage[ticker]
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+        return missing
+
+    def load(self, ticker, start=None, end=None):
+        """
+        Cached closing prices of a ticker within [start, end), or None if nothing is cached.
+        """
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        prices = pd.read_parquet(path)["close"]
+        if start is not None:
+            prices = prices[prices.index >= pd.Timestamp(start)]
+        if end is not None:
+            prices = prices[prices.index < pd.Timestamp(end)]
+        return prices.rename(ticker)
+
+    def store(self, ticker, prices, start, end):
+        """
+        Merge newly fetched prices for [start, end) into the cache of a ticker.
+
+        Once the provider has answered, coverage is recorded up to min(end, today), so
+        that weekends, holidays and future dates at the end of a range are not fetched
+        again. An empty answer for a range holding business days is not recorded: it is
+        fetched again next time. Coverage written by other processes is re-read and
+        merged under a file lock.
+        """
+        prices = prices.dropna()
+        start = pd.Timestamp(start)
+        end = min(pd.Timestamp(end), self._today())
+        if start >= end or (prices.empty and len(pd.bdate_range(start, end - pd.Timedelta(days=1)))):
+            return
+
+        with self._lock, self._file_lock():
+            if not prices.empty:
+                cached = self.load(ticker)
+                if cached is not None:
+                    prices = pd.concat([cached, prices])
+                    prices = prices[~prices.index.duplicated(keep="last")]
+                path = self._path(ticker)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                prices.sort_index().rename("close").to_frame().to_parquet(tmp_path)
+                os.replace(tmp_path, path)
+
+            self._coverage = self._read_coverage()
+            if ticker in self._coverage:
+                covered_start, covered_end = self._coverage[ticker]
+                start, end = min(start, covered_start), max(end, covered_end)
+            self._coverage[ticker] = (start, end)
+            self._write_coverage()
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+
+class ReturnsStore:
+    """
+    Memory-mapped, column-major (Fortran order) store of asset returns.
+
+    The returns matrix lives in a .npy file mapped read-only into memory: every
+    reader, including worker processes, shares the same physical pages through the
+    OS page cache instead of holding its own copy. Each asset is a contiguous column,
+    so per-asset reads touch only that asset's pages.
+    """
+
+    DATA_FILE = "returns.npy"
+    META_FILE = "meta.json"
+
+    def __init__(self, directory):
+        """
+        Open an existing store read-only.
+
+        :param directory: Directory written by `ReturnsStore.write`.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, self.META_FILE)) as f:
+            meta = json.load(f)
+        self.columns = pd.Index(meta["columns"])
+        self.index = pd.DatetimeIndex(meta["index"]) if meta["datetime_index"] else pd.Index(meta["index"])
+        self.values = np.load(os.path.join(directory, self.DATA_FILE), mmap_mode="r")
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, cls.META_FILE))
+
+    @classmethod
+    def open_or_write(cls, directory, returns, dtype="float64"):
+        """
+        Open the store at `directory`, writing it first if it does not exist yet.
+
+        Meant for directories named after the content of the returns (e.g. their
+        fingerprint): the files of an existing store are never rewritten while memory
+        maps of earlier runs or worker processes may still be reading them.
+        """
+        if cls.exists(directory):
+            return cls(directory)
+        return cls.write(directory, returns, dtype)
+
+    @classmethod
+    def write(cls, directory, returns, dtype="float64"):
+        """
+        Write a returns DataFrame to a new store, one column at a time.
+
+        The files are written to a temporary sibling directory which is then renamed
+        into place, so readers never see a partial store. An existing store at
+        `directory` is left untouched and opened instead.
+
+        :param directory: Target directory (parent directories created if needed).
+        :param returns: DataFrame of returns (dates x assets).
+        :param dtype: "float64", or "float32" to halve the memory footprint.
+        :return: The opened ReturnsStore.
+        """
+        directory = os.path.normpath(directory)
+        parent = os.path.dirname(directory)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        tmp_directory = f"{directory}.tmp-{os.getpid()}-{uuid.uuid4().hex}"
+        os.makedirs(tmp_directory)
+        try:
+            cls._write_files(tmp_directory, returns, dtype)
+            os.rename(tmp_directory, directory)
+        except OSError:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+            if not cls.exists(directory):
+                raise
+            # Written concurrently by another process: use that store
+
+        return cls(directory)
+
+    @classmethod
+    def _write_files(cls, directory, returns, dtype):
+        returns = pd.DataFrame(returns)
+        data = np.lib.format.open_memmap(
+            os.path.join(directory, cls.DATA_FILE), mode="w+", dtype=dtype,
+            shape=returns.shape, fortran_order=True,
+        )
+        for j in range(returns.shape[1]):
+            data[:, j] = returns.iloc[:, j].to_numpy()
+        data.flush()
+        del data
+
+        datetime_index = isinstance(returns.index, pd.DatetimeIndex)
+        meta = {
+            "columns": [str(column) for column in returns.columns],
+            "index": [str(i) for i in returns.index] if datetime_index else returns.index.tolist(),
+            "datetime_index": datetime_index,
+        }
+        with open(os.path.join(directory, cls.META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __len__(self):
+        return len(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        # Zero-copy unless another dtype is requested
+        if dtype is None or np.dtype(dtype) == self.values.dtype:
+            return self.values
+        return self.values.astype(dtype)
+
+    def column(self, name):
+        """
+        Returns of one asset as a zero-copy view on the mapped file.
+        """
+        return self.values[:, self.columns.get_loc(name)]
+
+    def to_frame(self):
+        """
+        DataFrame view of the store (no copy of the mapped data).
+        """
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+
+    def __reduce__(self):
+        # Worker processes re-open the mapping instead of receiving a pickled copy
+        return type(self), (self.directory,)
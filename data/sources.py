@@ -0,0 +1,188 @@
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class DataSource:
+    """
+    Interface of a price provider used by DataCollector.
+
+    A provider returns daily closing prices as a DataFrame indexed by date, with one
+    column per ticker, restricted to the half-open range [start, end).
+    """
+
+    # Whether the provider needs network access (refused in offline mode)
+    remote = False
+
+    def fetch(self, tickers, start, end):
+        raise NotImplementedError(f"{type(self).__name__} must implement fetch().")
+
+
+class YahooFinanceSource(DataSource):
+    """
+    Daily closing prices downloaded from Yahoo Finance.
+    """
+
+    remote = True
+
+    def fetch(self, tickers, start, end):
+        try:
+            import yfinance as yf
+
+            data = yf.download(tickers, start=start, end=end, progress=False)
+            logger.debug(
+                "Fetched data from Yahoo Finance",
+                extra={"tickers": tickers, "rows": len(data), "columns": [str(column) for column in data.columns]},
+            )
+
+            if "Adj Close" in data.columns:
+                closes = data["Adj Close"]
+            elif "Close" in data.columns:
+                closes = data["Close"]
+            else:
+                raise KeyError("Neither 'Adj Close' nor 'Close' columns are present.")
+        except Exception as e:
+            raise ConnectionError(f"Failed to fetch data: {e}")
+
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(tickers[0])
+        return closes
+
+
+def read_chunks(path, chunksize):
+    """
+    Iterate over a CSV or Parquet file in DataFrames of at most `chunksize` rows.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            # Files written by pandas may store the dates as index
+            if not isinstance(chunk.index, pd.RangeIndex):
+                chunk = chunk.reset_index()
+            yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def daily_closes(chunks, start, end, date_column=None, ticker_column=None, price_column=None):
+    """
+    Reduce a stream of (possibly intraday) price chunks to daily closing prices.
+
+    Only one chunk and the running daily closes are held in memory at a time, so
+    files far larger than memory can be ingested. Chunks must be in time order.
+
+    :param chunks: Iterable of DataFrames.
+    :param start: First date kept (inclusive).
+    :param end: Last date kept (exclusive).
+    :param date_column: Timestamp column (default: first column).
+    :param ticker_column: Ticker column of long-format files (one row per tick and
+                          ticker). Without it, every other column is a ticker.
+    :param price_column: Price column of long-format files.
+    :return: DataFrame of daily closes, one column per ticker.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    daily = []
+    for chunk in chunks:
+        date_column = date_column or chunk.columns[0]
+        timestamps = pd.to_datetime(chunk[date_column])
+        mask = (timestamps >= start) & (timestamps < end)
+        if not mask.any():
+            continue
+        chunk, days = chunk[mask], timestamps[mask].dt.normalize()
+
+        if ticker_column is not None:
+            closes = chunk.groupby([days, chunk[ticker_column]])[price_column].last().unstack()
+        else:
+            closes = chunk.drop(columns=date_column).groupby(days).last()
+        daily.append(closes)
+
+    if not daily:
+        return pd.DataFrame()
+    # A day split across two chunks keeps its last available price
+    closes = pd.concat(daily).groupby(level=0).last()
+    closes.index.name = "Date"
+    return closes.sort_index()
+
+
+class FileSource(DataSource):
+    """
+    Prices from a single local CSV or Parquet file, read in chunks.
+
+    The file is either wide (a timestamp column then one price column per ticker) or
+    long (timestamp, ticker and price columns, as in intraday tick exports).
+    """
+
+    def __init__(self, path, date_column=None, ticker_column=None, price_column="price",
+                 chunksize=1_000_000):
+        """
+        :param path: Path of the .csv or .parquet file.
+        :param date_column: Timestamp column (default: first column).
+        :param ticker_column: Ticker column for long-format files (None for wide files).
+        :param price_column: Price column for long-format files.
+        :param chunksize: Number of rows read at a time.
+        """
+        self.path = path
+        self.date_column = date_column
+        self.ticker_column = ticker_column
+        self.price_column = price_column
+        self.chunksize = chunksize
+
+    def fetch(self, tickers, start, end):
+        closes = daily_closes(
+            read_chunks(self.path, self.chunksize), start, end,
+            date_column=self.date_column,
+            ticker_column=self.ticker_column,
+            price_column=self.price_column,
+        )
+        return closes.reindex(columns=tickers)
+
+
+class DirectorySource(DataSource):
+    """
+    Prices from a directory of per-ticker files named `<ticker>.csv` or `<ticker>.parquet`.
+
+    Each file holds a timestamp column followed by an 'Adj Close' or 'Close' column
+    (or `price_column`), at daily or intraday frequency.
+    """
+
+    def __init__(self, directory, price_column=None, chunksize=1_000_000):
+        """
+        :param directory: Directory containing the per-ticker files.
+        :param price_column: Price column (default: 'Adj Close', then 'Close').
+        :param chunksize: Number of rows read at a time.
+        """
+        self.directory = directory
+        self.price_column = price_column
+        self.chunksize = chunksize
+
+    def _path(self, ticker):
+        for extension in (".parquet", ".csv"):
+            path = os.path.join(self.directory, f"{ticker}{extension}")
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No local price file for {ticker} in {self.directory}")
+
+    def _price_column(self, columns):
+        if self.price_column is not None:
+            return self.price_column
+        return "Adj Close" if "Adj Close" in columns else "Close"
+
+    def fetch(self, tickers, start, end):
+        closes = {}
+        for ticker in tickers:
+            chunks = (
+                chunk[[chunk.columns[0], self._price_column(chunk.columns)]]
+                for chunk in read_chunks(self._path(ticker), self.chunksize)
+            )
+            daily = daily_closes(chunks, start, end)
+            if daily.empty:
+                closes[ticker] = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+            else:
+                closes[ticker] = daily.iloc[:, 0]
+
+        return pd.DataFrame(closes).sort_index()
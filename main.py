@@ -1,73 +1,338 @@
-from methods.optimal_var import OptimalVaR
-from ui.ui import VaRUI
-from methods import *
-from backtesting.backtesting import Backtesting
-from results.report_generator import ReportGenerator
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from methods import method_registry
+from methods.batch import evaluate_portfolios
+from methods.portfolio_returns import PortfolioReturns
 from data.data_collector import DataCollector
+from data.returns_store import ReturnsStore
+from methods.executor import MethodExecutor
+from monitoring.instrumentation import Instrumentation, instrumented_stage
+
+logger = logging.getLogger(__name__)
 
 
 class VaRController:
+    # Method classes (Optimal-VaR included only if explicitly selected) are imported
+    # on first use: a Historical-only run never loads arch or scipy.stats.
+    METHOD_CLASSES = method_registry
+
     def __init__(self):
         self.var_methods = None
         self.start_date = None
         self.end_date = None
         self.assets = None
+        self.weights = None
         self.confidence_level = None
         self.data = None
         self.returns = None
         self.var_results = {}
+        self.var_errors = {}
+        self.var_level_results = {}
+        self.batch_results = None
+        self.batch_errors = {}
         self.backtesting_results = {}
+        self.backtesting_errors = {}
+        self.backtest_window = 250  # Estimation window of the backtested forecasts (capped at half the sample)
+        self.max_workers = None
+        self.cache_dir = None
+        self.offline = False
+        self.data_source = None
+        self.returns_store_dir = None
+        self.returns_dtype = "float64"
+        self.executor_backend = "thread"
+        self.report_dir = "."
+        self.report_filename = None  # Default: collision-free VaR_Report_<date>.xlsx in report_dir
+        self.report_path = None
+        self.result_cache_path = None  # SQLite result cache (disabled if None)
+        self.result_cache_max_bytes = 256 * 1024 ** 2
+        self._result_cache = None
+        # Per-stage and per-method timings of the run (pass trace_memory/profile to dig deeper)
+        self.instrumentation = Instrumentation()
 
+    @instrumented_stage("fetch_data")
     def fetch_data(self):
-        data_collector = DataCollector()
+        data_collector = DataCollector(cache_dir=self.cache_dir, offline=self.offline, source=self.data_source)
         data_collector.set_parameters(self.start_date, self.end_date, self.assets)
         self.data = data_collector.fetch_data()
         self.returns = data_collector.calculate_returns()
 
+    @instrumented_stage("initialize_var_methods")
     def initialize_var_methods(self):
         """
         Initializes only the selected VaR methods.
         """
-        method_classes = {
-            "Historical": HistoricalVaR,
-            "Variance-Covariance": ParametricVaR,
-            "Cornish-Fisher": CornishFisherVaR,
-            "Risk-Metrics": RiskMetricsVaR,
-            "GARCH": GARCHVaR,
-            "TVE": TVEVar,
-            "TVE-GARCH": TVEGarchVaR,
-            "Optimal-VaR": OptimalVaR,  # <-- Only include if explicitly selected
-        }
-
         # FIX: Ensure selected_methods exists before using it
         if not hasattr(self, 'selected_methods'):
             self.selected_methods = []  # Default to empty if not set
 
+        # Returns are validated and preprocessed once, then shared by every method.
+        # With a store directory, methods and worker processes read one memory-mapped copy,
+        # written once per content: stores still mapped by earlier runs are never rewritten.
+        if self.returns_store_dir:
+            from results.result_cache import data_fingerprint
+
+            directory = os.path.join(
+                self.returns_store_dir, f"{data_fingerprint(self.returns)}-{self.returns_dtype}"
+            )
+            shared_returns = PortfolioReturns(
+                ReturnsStore.open_or_write(directory, self.returns, dtype=self.returns_dtype),
+                self.weights,
+            )
+        else:
+            shared_returns = PortfolioReturns(self.returns, self.weights)
+
         self.var_methods = {
-            name: cls(self.returns, self.confidence_level) for name, cls in method_classes.items()
-            if name in self.selected_methods
+            name: self.METHOD_CLASSES[name](shared_returns, self.confidence_level)
+            for name in self.METHOD_CLASSES if name in self.selected_methods
         }
 
         
         
 
-    def calculate_var(self):
-        self.var_results = {
-    method: (instance.calculate_var().get("var") if isinstance(instance.calculate_var(), dict) else instance.calculate_var())
-    for method, instance in self.var_methods.items()
-}
+    @staticmethod
+    def _var_value(result):
+        return result.get("var") if isinstance(result, dict) else result
+
+    @property
+    def result_cache(self):
+        """
+        Persistent result cache, opened on first use (None when `result_cache_path` is not set).
+        """
+        if self.result_cache_path is None:
+            return None
+        if self._result_cache is None or self._result_cache.path != self.result_cache_path:
+            from results.result_cache import ResultCache
+
+            self._result_cache = ResultCache(self.result_cache_path, self.result_cache_max_bytes)
+        return self._result_cache
+
+    def _cache_context(self):
+        """
+        Fingerprint and scope of the current returns: results computed on other data for the
+        same assets and dates are invalidated when new results are stored.
+        """
+        from results.result_cache import data_fingerprint
+
+        scope = json.dumps([sorted(map(str, self.assets or [])), str(self.start_date), str(self.end_date)])
+        return data_fingerprint(self.returns), scope
+
+    def _run_methods(self, confidence_levels=None, on_result=None, cancel_event=None, var_methods=None):
+        """
+        Exécute les méthodes sélectionnées ; avec un cache de résultats, seules les méthodes
+        absentes du cache sont calculées, puis leurs résultats y sont enregistrés.
+
+        :param var_methods: Sous-ensemble {nom: instance} à exécuter (par défaut `var_methods`).
+        """
+        var_methods = self.var_methods if var_methods is None else var_methods
+        cache = self.result_cache if self.returns is not None else None
+        executor = MethodExecutor(max_workers=self.max_workers, backend=self.executor_backend)
+        if cache is None:
+            return executor.run(var_methods, confidence_levels, self.instrumentation, on_result, cancel_event)
+
+        from results.result_cache import MISSING, method_parameters
+
+        data_hash, scope = self._cache_context()
+        weights = None if self.weights is None else [float(weight) for weight in self.weights]
+        levels = None if confidence_levels is None else [float(level) for level in confidence_levels]
+        keys, cached = {}, {}
+        for name, instance in var_methods.items():
+            parameters = dict(method_parameters(instance), weights=weights, confidence_levels=levels)
+            keys[name] = cache.key(data_hash, "var", name, parameters)
+            value = cache.get(keys[name])
+            if value is not MISSING:
+                cached[name] = value
+                if on_result is not None:
+                    on_result(name, value, None)
+
+        if cached:
+            logger.info("Result cache hits: %s", sorted(cached), extra={"cached_methods": sorted(cached)})
+        missing = {name: instance for name, instance in var_methods.items() if name not in cached}
+        computed, errors = executor.run(missing, confidence_levels, self.instrumentation, on_result, cancel_event)
+        for name, result in computed.items():
+            cache.put(keys[name], result, data_hash, scope)
 
-        # 🔍 Debugging print
-        print(f"VaR Results Computed in Controller: {self.var_results}")
+        results = {**cached, **computed}
+        return {name: results[name] for name in var_methods if name in results}, errors
+
+    @instrumented_stage("calculate_var")
+    def calculate_var(self, on_result=None, cancel_event=None):
+        """
+        Calcule chaque méthode sélectionnée une seule fois, en parallèle.
+        Les méthodes en échec sont reportées dans `var_errors` sans interrompre les autres.
+
+        :param on_result: Fonction optionnelle `on_result(méthode, var, erreur)` appelée dès
+                          qu'une méthode se termine (résultats partiels pour l'interface).
+        :param cancel_event: threading.Event optionnel pour abandonner les méthodes restantes.
+        """
+        def report(method, result, error):
+            on_result(method, None if error is not None else self._var_value(result), error)
+
+        results, self.var_errors = self._run_methods(
+            on_result=report if on_result is not None else None,
+            cancel_event=cancel_event,
+        )
+
+        self.var_results = {method: self._var_value(result) for method, result in results.items()}
+
+        logger.debug("VaR results computed", extra={"var_results": self.var_results})
+        for method, error in self.var_errors.items():
+            logger.error("VaR calculation failed for %s: %s", method, error, extra={"method": method})
 
         return self.var_results
 
 
+    @instrumented_stage("calculate_var_levels")
+    def calculate_var_levels(self, confidence_levels, per_level_fallback=False):
+        """
+        Calcule la VaR de chaque méthode sélectionnée pour plusieurs niveaux de confiance
+        à la fois, sans recréer d'instance par niveau.
+
+        :param confidence_levels: Séquence de niveaux (ex. [0.9, 0.95, 0.975, 0.99, 0.995]).
+        :param per_level_fallback: Calculer les méthodes sans calcul multi-niveaux
+                                   (ex. Optimal-VaR) une fois par niveau, au lieu de les
+                                   reporter dans `var_errors` sans les exécuter.
+        :return: Dictionnaire {méthode: tableau structuré (confidence_level, var)}.
+        """
+        supported = {
+            name: instance for name, instance in self.var_methods.items() if instance.supports_levels()
+        }
+        self.var_level_results, self.var_errors = self._run_methods(confidence_levels, var_methods=supported)
+
+        others = [name for name in self.var_methods if name not in supported]
+        if per_level_fallback and others:
+            results, errors = self._run_methods_per_level(others, confidence_levels)
+            self.var_level_results.update(results)
+            self.var_errors.update(errors)
+        else:
+            for name in others:
+                self.var_errors[name] = NotImplementedError(
+                    f"{name} ne supporte pas le calcul de plusieurs niveaux de confiance."
+                )
+        self.var_level_results = {
+            name: self.var_level_results[name] for name in self.var_methods if name in self.var_level_results
+        }
+
+        for method, error in self.var_errors.items():
+            logger.error("VaR calculation failed for %s: %s", method, error, extra={"method": method})
+
+        return self.var_level_results
+
+    def _run_methods_per_level(self, names, confidence_levels):
+        """
+        Calcule les méthodes `names` une fois par niveau, sur les rendements partagés, au
+        format de `calculate_var_levels`.
+        """
+        levels = np.atleast_1d(np.asarray(confidence_levels, dtype=float))
+        values = {name: np.empty(len(levels)) for name in names}
+        errors = {}
+        for i, level in enumerate(levels):
+            var_methods = {
+                name: self.METHOD_CLASSES[name](self.var_methods[name].returns_data, float(level))
+                for name in names if name not in errors
+            }
+            results, level_errors = self._run_methods(var_methods=var_methods)
+            errors.update(level_errors)
+            for name, result in results.items():
+                var = self._var_value(result)
+                values[name][i] = np.nan if var is None else var
+
+        results = {}
+        for name in names:
+            if name not in errors:
+                results[name] = np.empty(len(levels), dtype=[("confidence_level", "f8"), ("var", "f8")])
+                results[name]["confidence_level"] = levels
+                results[name]["var"] = values[name]
+        return results, errors
+
+    @instrumented_stage("calculate_var_batch")
+    def calculate_var_batch(self, weights_matrix, portfolio_names=None):
+        """
+        Évalue plusieurs allocations des actifs déjà chargés en un seul lot : les données
+        sont récupérées et validées une fois, puis chaque méthode sélectionnée calcule
+        la VaR de tous les portefeuilles à la fois.
+
+        :param weights_matrix: Poids (actifs x portefeuilles), une colonne par allocation.
+        :param portfolio_names: Noms des portefeuilles (optionnel).
+        :return: DataFrame portefeuilles x méthodes (+ Expected Shortfall historique).
+        """
+        if self.returns is None:
+            self.fetch_data()
+
+        method_classes = {
+            name: self.METHOD_CLASSES[name] for name in self.METHOD_CLASSES
+            if name in getattr(self, "selected_methods", [])
+        }
+        self.batch_results, self.batch_errors = evaluate_portfolios(
+            self.returns, weights_matrix, method_classes, self.confidence_level, portfolio_names
+        )
+
+        for method, error in self.batch_errors.items():
+            logger.error("Batch VaR calculation failed for %s: %s", method, error, extra={"method": method})
+
+        return self.batch_results
+
+    @instrumented_stage("perform_backtesting")
     def perform_backtesting(self):
-        backtesting = Backtesting(self.returns, self.var_results)
-        self.backtesting_results = backtesting.perform_tests(self.var_results)
+        """
+        Backtest des méthodes sélectionnées sur leurs prévisions de VaR glissantes
+        (`backtest_forecasts` sur `backtest_window` observations, au plus la moitié de
+        l'échantillon ; les méthodes GARCH ne sont ajustées qu'une fois) : Kupiec,
+        Christoffersen, couverture conditionnelle et Hurlin-Tokpavi par méthode.
+        Les méthodes sans prévision glissante sont reportées dans `backtesting_errors`.
+
+        :return: DataFrame indexé par (method, confidence_level).
+        """
+        from backtesting.engine import BacktestEngine, rolling_forecasts
+
+        supported = {
+            name: instance for name, instance in self.var_methods.items() if instance.supports_rows()
+        }
+        unsupported = {
+            name: NotImplementedError(f"{name} ne fournit pas de prévisions de VaR glissantes.")
+            for name in self.var_methods if name not in supported
+        }
+
+        cache = self.result_cache if self.returns is not None else None
+        if cache is not None:
+            from results.result_cache import MISSING, method_parameters
+
+            # Results depend only on the returns, the backtested methods and the forecast window
+            data_hash, scope = self._cache_context()
+            parameters = {
+                "methods": {name: method_parameters(instance) for name, instance in supported.items()},
+                "weights": None if self.weights is None else [float(weight) for weight in self.weights],
+                "window": self.backtest_window,
+            }
+            key = cache.key(data_hash, "backtesting", "all", parameters)
+            cached = cache.get(key)
+            if cached is not MISSING:
+                self.backtesting_results, errors = cached
+                self.backtesting_errors = {**unsupported, **errors}
+                return self.backtesting_results
+
+        returns, forecasts, errors = rolling_forecasts(supported, self.backtest_window)
+        self.backtesting_errors = {**unsupported, **errors}
+        for method, error in self.backtesting_errors.items():
+            logger.error("Backtesting failed for %s: %s", method, error, extra={"method": method})
+        if not forecasts:
+            raise ValueError("No selected method provides rolling VaR forecasts to backtest.")
+
+        engine = BacktestEngine.from_forecasts(returns, forecasts)
+        self.backtesting_results = engine.run().join(engine.hurlin_tokpavi())
+        if cache is not None:
+            cache.put(key, (self.backtesting_results, errors), data_hash, scope)
+        return self.backtesting_results
 
+    @instrumented_stage("generate_reports")
     def generate_reports(self):
+        # matplotlib and xlsxwriter are only loaded when a report is requested
+        from results.report_generator import ReportGenerator
+
         report_generator = ReportGenerator(
                     assets=self.assets,
                     start_date=self.start_date,
@@ -75,14 +340,104 @@ class VaRController:
                     confidence_level=self.confidence_level,
                     selected_methods=self.selected_methods,
                     var_results=self.var_results,
-                    returns=self.returns  # ✅ Now passing the returns data
+                    returns=self.returns,  # ✅ Now passing the returns data
+                    output_dir=self.report_dir,
+                    report_filename=self.report_filename,
 )
 
+        # Reports of the same day get distinct names instead of overwriting each other
+        self.report_path = report_generator.generate_report()
+        return self.report_path
+
+    @instrumented_stage("update_end_of_day")
+    def update_end_of_day(self, state_path, window=None, garch_refit_every=None):
+        """
+        Mise à jour incrémentale de fin de journée.
+
+        Les méthodes Historical, Risk-Metrics et GARCH et leur backtesting sont tenus à
+        jour dans un état persistant : seuls les rendements postérieurs à la dernière mise
+        à jour y sont intégrés. L'état est reconstruit sur l'historique s'il n'existe pas
+        ou si le portefeuille, le niveau de confiance ou les méthodes ont changé. Les
+        autres méthodes sélectionnées sont calculées normalement.
+
+        `backtesting_results` reçoit le tableau de couverture indexé par (method,
+        confidence_level) de `perform_backtesting`, tenu à jour depuis l'historique
+        (sans le test de Hurlin-Tokpavi, qui demande toute la séquence des violations).
+
+        :param state_path: Fichier JSON de l'état entre deux exécutions.
+        :param window: Taille de la fenêtre des rendements (None : tout l'historique).
+        :param garch_refit_every: Réajuster le GARCH tous les n jours (None : jamais).
+        :return: Dictionnaire {méthode: VaR}.
+        """
+        from methods.incremental import IncrementalVaR
+
+        if self.returns is None:
+            self.fetch_data()
+
+        selected = getattr(self, "selected_methods", [])
+        methods = [name for name in IncrementalVaR.METHODS if name in selected]
+        scope = {
+            "assets": [str(asset) for asset in self.assets or []],
+            "weights": None if self.weights is None else [float(weight) for weight in self.weights],
+            "confidence_level": self.confidence_level,
+            "methods": methods,
+            "window": window,
+            "garch_refit_every": garch_refit_every,
+            "backtest_window": self.backtest_window,
+        }
+        values = PortfolioReturns(self.returns, self.weights).values
+        dates = self.returns.index
+
+        state = IncrementalVaR.load(state_path) if os.path.exists(state_path) else None
+        if state is not None and state.scope != scope:
+            logger.info("Incremental state %s does not match the portfolio, rebuilding it", state_path)
+            state = None
+
+        if state is None:
+            state = IncrementalVaR.from_history(
+                values, dates[-1], backtest_window=self.backtest_window,
+                confidence_level=self.confidence_level, methods=methods,
+                window=window, garch_refit_every=garch_refit_every,
+            )
+            state.scope = scope
+        else:
+            new_days = dates > pd.Timestamp(state.last_date)
+            for value, date in zip(values[new_days], dates[new_days]):
+                state.update(value, date)
+            logger.info("Incremental update with %d new returns", int(new_days.sum()))
+        state.save(state_path)
+
+        # Results cached on earlier data of this portfolio are superseded by the update
+        cache = self.result_cache
+        if cache is not None:
+            data_hash, cache_scope = self._cache_context()
+            cache.invalidate(cache_scope, data_hash)
+
+        self.var_results = dict(state.var)
+        self.backtesting_results = state.backtest_results()
+
+        others = [name for name in selected if name not in IncrementalVaR.METHODS]
+        if others:
+            self.initialize_var_methods()
+            self.var_methods = {name: instance for name, instance in self.var_methods.items() if name in others}
+            results, self.var_errors = self._run_methods()
+            self.var_results.update({method: self._var_value(result) for method, result in results.items()})
 
-        report_generator.generate_report()
+        return self.var_results
+
+    def write_timing_report(self, path):
+        """
+        Write the JSON timing report of the run (stages, methods, optional profile).
+        """
+        return self.instrumentation.write_report(path)
 
 
 if __name__ == "__main__":
+    # Tk is only needed by the GUI; headless runs go through batch_runner.py
+    from ui.ui import VaRUI
+    from monitoring.logging_setup import configure_logging
+
+    configure_logging()
     controller = VaRController()
     app = VaRUI(controller)
     app.run()
@@ -2,11 +2,38 @@
 # -*- coding: utf-8 -*-
 # __init__.py
 
-from .base_method import BaseVaRMethod
-from .risk_metrics_var import RiskMetricsVaR
-from .historical_var import HistoricalVaR
-from .parametric_var import ParametricVaR
-from .cornish_fisher_var import CornishFisherVaR
-from .garch_var import GARCHVaR
-from .tve_var import TVEVar
-from .tve_garch_var import TVEGarchVaR
+from importlib import import_module
+
+from .registry import MethodRegistry, method_registry
+
+# Exports chargés à la première utilisation (PEP 562) : importer `methods` ne charge
+# ni les dépendances lourdes (arch, scipy.stats) ni les méthodes non utilisées.
+_LAZY_EXPORTS = {
+    "PortfolioReturns": ".portfolio_returns",
+    "BaseVaRMethod": ".base_method",
+    "RiskMetricsVaR": ".risk_metrics_var",
+    "HistoricalVaR": ".historical_var",
+    "ParametricVaR": ".parametric_var",
+    "CornishFisherVaR": ".cornish_fisher_var",
+    "GARCHVaR": ".garch_var",
+    "TVEVar": ".tve_var",
+    "TVEGarchVaR": ".tve_garch_var",
+    "MonteCarloVaR": ".monte_carlo_var",
+    "OnlineVaR": ".online",
+    "IncrementalVaR": ".incremental",
+    "evaluate_portfolios": ".batch",
+}
+
+__all__ = ["MethodRegistry", "method_registry", *_LAZY_EXPORTS]
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
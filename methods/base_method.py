@@ -2,10 +2,17 @@
 # -*- coding: utf-8 -*-
 # base_method.py
 
+import logging
+
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from data.returns_store import ReturnsStore
+from .portfolio_returns import PortfolioReturns
+from .bootstrap import bootstrap_var
 
-from backtesting import backtesting
+logger = logging.getLogger(__name__)
 
 
 class BaseVaRMethod:
@@ -14,29 +21,231 @@ class BaseVaRMethod:
     Toutes les méthodes spécifiques doivent hériter de cette classe.
     """
 
+    # Répartir les réplications bootstrap sur un pool de processus (méthodes coûteuses)
+    BOOTSTRAP_IN_PROCESSES = False
+
+    # Taille de fenêtre à partir de laquelle une fenêtre triée glissante (O(log w) par pas)
+    # est plus rapide que la sélection partielle vectorisée de chaque fenêtre
+    # (voir benchmarks/rolling_order_statistics.py)
+    SLIDING_MIN_WINDOW = 250
+
     def __init__(self, portfolio_returns, confidence_level=0.95, weights=None):
         """
         Initialise la méthode de calcul de la VaR.
 
-        :param portfolio_returns: Série temporelle des rendements du portefeuille (1D ou 2D).
+        :param portfolio_returns: Série temporelle des rendements du portefeuille (1D ou 2D),
+                                  objet PortfolioReturns partagé entre plusieurs méthodes, ou
+                                  ReturnsStore mappé en mémoire.
         :param confidence_level: Niveau de confiance pour la VaR (ex. 0.95 pour 95%).
         :param weights: Poids des actifs dans le portefeuille (par défaut égalité entre les actifs).
         """
-        self.portfolio_returns = np.array(portfolio_returns)
+        if isinstance(portfolio_returns, ReturnsStore):
+            portfolio_returns = PortfolioReturns(portfolio_returns, weights)
+
+        if isinstance(portfolio_returns, PortfolioReturns):
+            self.returns_data = portfolio_returns
+            self.index = portfolio_returns.index
+            self.portfolio_returns = portfolio_returns.series
+            weights = portfolio_returns.weights
+        else:
+            self.returns_data = None
+            self.index = getattr(portfolio_returns, "index", None)
+            self.portfolio_returns = np.asarray(portfolio_returns)
         self.confidence_level = confidence_level
         self.weights = weights
 
 
-    def calculate_var(self):
+    def calculate_var(self, confidence_levels=None):
+        """
+        Calcule la VaR au niveau de confiance de l'instance (`_calculate_var`).
+
+        :param confidence_levels: Séquence optionnelle de niveaux de confiance ; si fournie,
+                                  retourne le tableau structuré de `calculate_var_levels`.
+        :return: Dictionnaire de résultats de la méthode (clé "var" notamment).
+        """
+        if confidence_levels is not None:
+            return self.calculate_var_levels(confidence_levels)
+        return self._calculate_var()
+
+    def _calculate_var(self):
+        """
+        Calcule la VaR au niveau de confiance de l'instance.
+        Chaque méthode doit redéfinir cette méthode.
+        """
+        raise NotImplementedError(f"{type(self).__name__} doit implémenter _calculate_var.")
+
+    def calculate_var_levels(self, confidence_levels):
+        """
+        Calcule la VaR pour plusieurs niveaux de confiance en une seule passe
+        (un tri, une recherche vectorisée des quantiles, un seul ajustement de modèle).
+
+        :param confidence_levels: Séquence de niveaux de confiance (ex. [0.9, 0.95, 0.99]).
+        :return: np.ndarray structuré, une ligne par niveau, champs "confidence_level" et "var".
+        """
+        self.validate_inputs()
+        levels = np.atleast_1d(np.asarray(confidence_levels, dtype=float))
+        if np.any((levels <= 0) | (levels >= 1)):
+            raise ValueError("Les niveaux de confiance doivent être compris strictement entre 0 et 1.")
+
+        result = np.empty(len(levels), dtype=[("confidence_level", "f8"), ("var", "f8")])
+        result["confidence_level"] = levels
+        result["var"] = self._var_levels(levels)
+        return result
+
+    @classmethod
+    def supports_levels(cls):
         """
-        Calculer la VaR en utilisant plusieurs méthodes et effectuer le backtesting.
+        Indique si la méthode calcule plusieurs niveaux de confiance en une passe.
         """
-        # Calcul de la VaR avec plusieurs méthodes
-        var_values = {method: instance.calculate_var() for method, instance in var_methods.items()}
+        return cls._var_levels is not BaseVaRMethod._var_levels
 
-        # Effectuer le backtesting
-        backtesting_result = backtesting.perform_tests()
-        return backtesting_result
+    def _var_levels(self, levels):
+        """
+        Calcule la VaR pour un vecteur de niveaux de confiance.
+        Les méthodes qui supportent plusieurs niveaux doivent redéfinir cette méthode.
+        """
+        raise NotImplementedError(f"{type(self).__name__} ne supporte pas plusieurs niveaux de confiance.")
+
+    def _levels_z_scores(self, levels):
+        """
+        Quantiles empiriques (en valeur absolue) pour un vecteur de niveaux de confiance.
+        """
+        return np.abs(np.percentile(self.returns_data.sorted, (1 - levels) * 100))
+
+    def _levels_tail_means(self, levels):
+        """
+        Moyenne de la queue gauche pour chaque niveau, à partir d'une somme cumulée des
+        rendements triés (NaN si la queue est vide, comme np.mean).
+        """
+        sorted_returns = self.returns_data.sorted
+        index = ((1 - levels) * len(sorted_returns)).astype(int)
+        cumulative = np.concatenate(([0.0], np.cumsum(sorted_returns)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(index > 0, cumulative[index] / index, np.nan)
+
+    def rolling_var(self, window, step=1):
+        """
+        Calcule une série temporelle de prévisions de VaR sur fenêtre glissante.
+
+        Toutes les fenêtres sont traitées en une seule passe vectorisée sur une vue
+        glissante (sans copie) des rendements. La VaR estimée sur les `window`
+        rendements précédant une date est indexée à cette date, ce qui aligne
+        directement la série sur les rendements réalisés pour le backtesting.
+
+        :param window: Nombre d'observations par fenêtre.
+        :param step: Pas (en observations) entre deux fenêtres successives.
+        :return: pd.Series des VaR prévues, indexée par date.
+        """
+        windows, index = self._rolling_windows(window, step)
+        return pd.Series(self._var_rows(windows), index=index, name=type(self).__name__)
+
+    def backtest_forecasts(self, window, step=1):
+        """
+        Prévisions de VaR glissantes utilisées pour le backtesting (`perform_backtesting`,
+        Optimal-VaR) ; par défaut celles de `rolling_var`. Les méthodes dont la
+        réestimation par fenêtre est coûteuse peuvent la remplacer par une approximation
+        (ex. GARCH : un seul ajustement, variance conditionnelle filtrée).
+
+        :return: pd.Series des VaR prévues, indexée par date.
+        """
+        return self.rolling_var(window, step)
+
+    def _rolling_windows(self, window, step):
+        """
+        Fenêtres glissantes (vue sans copie) des `window` rendements précédant chaque date
+        de prévision, et index de ces dates.
+        """
+        self.validate_inputs()
+        values = self.portfolio_returns.to_numpy(dtype=float)
+
+        if window < 2 or window >= len(values):
+            raise ValueError("La fenêtre doit être comprise entre 2 et le nombre d'observations - 1.")
+        if step < 1:
+            raise ValueError("Le pas doit être un entier strictement positif.")
+
+        windows = sliding_window_view(values[:-1], window)[::step]
+        index = self.index if self.index is not None else pd.RangeIndex(len(values))
+        return windows, index[window::step]
+
+    @classmethod
+    def supports_rows(cls):
+        """
+        Indique si la méthode calcule la VaR par lignes (`rolling_var`, `evaluate_portfolios`).
+        """
+        return cls._var_rows is not BaseVaRMethod._var_rows
+
+    def _var_rows(self, samples):
+        """
+        Calcule la VaR de chaque ligne d'une matrice d'échantillons (n_lignes x taille) :
+        fenêtres glissantes pour `rolling_var`, séries de P&L pour `evaluate_portfolios`.
+        Les méthodes qui supportent ces calculs doivent redéfinir cette méthode.
+        """
+        raise NotImplementedError(f"{type(self).__name__} ne supporte pas le calcul par lignes.")
+
+    def _bootstrap_rows(self, samples):
+        """
+        VaR de chaque réplication bootstrap (une ligne par réplication) ; par défaut `_var_rows`.
+        """
+        return self._var_rows(samples)
+
+    def _sliding_source(self, samples, min_window=None):
+        """
+        Série d'origine et pas lorsque les lignes sont les fenêtres glissantes d'une même
+        série (vue sans copie de `rolling_var`) assez larges pour profiter d'une fenêtre
+        triée glissante ; None sinon (ex. séries de P&L de portefeuilles indépendants).
+
+        :param min_window: Largeur minimale des fenêtres (par défaut SLIDING_MIN_WINDOW).
+        """
+        min_window = self.SLIDING_MIN_WINDOW if min_window is None else min_window
+        if samples.ndim != 2 or len(samples) < 2 or samples.shape[1] < min_window:
+            return None
+        if not np.shares_memory(samples[0], samples[1]):
+            return None
+        row_stride, item_stride = samples.strides
+        if item_stride <= 0 or row_stride % item_stride:
+            return None
+        step = row_stride // item_stride
+        if not 0 < step < samples.shape[1]:
+            return None
+        return np.concatenate([samples[0], samples[1:, -step:].ravel()]), step
+
+    def _z_score(self):
+        """
+        Quantile empirique (en valeur absolue) des rendements au niveau de confiance.
+        """
+        return np.abs(self.returns_data.percentile((1 - self.confidence_level) * 100))
+
+    def _row_z_scores(self, samples):
+        """
+        Quantile empirique (en valeur absolue) de chaque ligne au niveau de confiance.
+        """
+        return np.abs(np.percentile(samples, (1 - self.confidence_level) * 100, axis=1))
+
+    def bootstrap_var(self, n_replicates=1000, scheme="iid", block_length=None, interval=0.90,
+                      chunk_size=None, n_workers=None, seed=None):
+        """
+        Intervalles de confiance bootstrap (iid ou stationnaire par blocs) de la VaR et
+        de l'Expected Shortfall. Voir `methods.bootstrap.bootstrap_var`.
+        """
+        return bootstrap_var(self, n_replicates, scheme, block_length, interval, chunk_size,
+                             n_workers, seed)
+
+    def decompose(self):
+        """
+        Décompose la VaR par actif (VaR marginale, composante et incrémentale) en une passe.
+        Les méthodes qui supportent la décomposition doivent redéfinir cette méthode.
+        """
+        raise NotImplementedError(f"{type(self).__name__} ne supporte pas la décomposition par actif.")
+
+    def _asset_weights(self):
+        """
+        Poids des actifs utilisés pour agréger le portefeuille (1 pour un actif unique).
+        """
+        return np.asarray(self.weights if self.weights is not None else np.ones(1), dtype=float)
+
+    def _asset_names(self):
+        columns = self.returns_data.columns
+        return list(columns) if columns is not None else list(range(self.returns_data.asset_returns.shape[1]))
 
     def get_percentile(self):
         """
@@ -48,42 +257,14 @@ class BaseVaRMethod:
         """
         Validates the inputs before performing VaR calculation.
         Ensures the portfolio returns are properly formatted.
+
+        La conversion et la pondération sont déléguées à PortfolioReturns ; lorsqu'un
+        objet partagé est fourni, elles ne sont pas refaites.
         """
-        if self.portfolio_returns is None:
-            raise ValueError("Portfolio returns data is None. Please provide valid data.")
-
-        # Convert numpy.ndarray to pandas DataFrame
-        if isinstance(self.portfolio_returns, np.ndarray):
-            if self.portfolio_returns.size == 0:
-                raise ValueError("Portfolio returns data is empty.")
-            self.portfolio_returns = pd.DataFrame(self.portfolio_returns)
-
-        # Vérifiez si DataFrame est vide
-        if isinstance(self.portfolio_returns, pd.DataFrame) and self.portfolio_returns.empty:
-            raise ValueError("Portfolio returns DataFrame is empty. Please check the data source.")
-
-        # Calculer la moyenne pondérée pour les données à plusieurs colonnes
-        if isinstance(self.portfolio_returns, pd.DataFrame):
-            num_columns = self.portfolio_returns.shape[1]
-            if num_columns > 1:
-                if self.weights is None:
-                    # Poids égaux si non spécifiés
-                    self.weights = np.ones(num_columns) / num_columns
-                elif len(self.weights) != num_columns:
-                    raise ValueError("Le nombre de poids ne correspond pas au nombre de colonnes.")
-                # Calcul de la moyenne pondérée
-                self.portfolio_returns = pd.Series(
-                    np.dot(self.portfolio_returns.values, self.weights)
-                )
-            else:
-                # Une seule colonne, conversion en Série
-                self.portfolio_returns = pd.Series(self.portfolio_returns.squeeze())
-
-        # Vérification finale pour les données 1D
-        elif isinstance(self.portfolio_returns, pd.Series):
-            pass  # Les données sont déjà au bon format
-        else:
-            raise ValueError("Invalid data format. Portfolio returns must be 1D or 2D.")
+        if self.returns_data is None:
+            self.returns_data = PortfolioReturns(self.portfolio_returns, self.weights)
+            self.weights = self.returns_data.weights
+        self.portfolio_returns = self.returns_data.series
 
         # Validation réussie
-        print("Portfolio returns validated:", self.portfolio_returns.head())
+        logger.debug("Portfolio returns validated", extra={"observations": len(self.returns_data)})
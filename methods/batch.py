@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# batch.py
+
+import numpy as np
+import pandas as pd
+
+from .portfolio_returns import PortfolioReturns
+
+
+def portfolio_pnl(asset_returns, weights_matrix):
+    """
+    P&L de tous les portefeuilles en un seul produit matriciel.
+
+    :param asset_returns: Rendements des actifs (T x N).
+    :param weights_matrix: Poids (N x P), une colonne par portefeuille.
+    :return: Matrice (P x T), une ligne par portefeuille (contiguë pour les calculs par ligne).
+    """
+    weights_matrix = np.asarray(weights_matrix, dtype=float)
+    if weights_matrix.ndim == 1:
+        weights_matrix = weights_matrix[:, np.newaxis]
+    if weights_matrix.shape[0] != np.shape(asset_returns)[1]:
+        raise ValueError(
+            f"La matrice de poids a {weights_matrix.shape[0]} lignes pour "
+            f"{np.shape(asset_returns)[1]} actifs."
+        )
+    return weights_matrix.T @ np.asarray(asset_returns).T
+
+
+def evaluate_portfolios(returns, weights_matrix, method_classes, confidence_level=0.95,
+                        portfolio_names=None):
+    """
+    VaR de chaque méthode et Expected Shortfall historique pour P allocations candidates
+    des mêmes actifs.
+
+    Les rendements sont validés une seule fois ; chaque méthode est instanciée une seule
+    fois et calcule la VaR de tous les portefeuilles d'un coup (quantiles et EWMA par
+    ligne de la matrice de P&L, via `_var_rows`).
+
+    :param returns: Rendements des actifs (T x N) ou PortfolioReturns déjà validé.
+    :param weights_matrix: Poids (N x P), une colonne par portefeuille.
+    :param method_classes: Dictionnaire {nom de méthode: classe de VaR}.
+    :param confidence_level: Niveau de confiance.
+    :param portfolio_names: Noms des portefeuilles (par défaut 0..P-1).
+    :return: (DataFrame portefeuilles x méthodes + "Expected-Shortfall",
+              dictionnaire {méthode: exception} des méthodes en échec).
+    """
+    if not isinstance(returns, PortfolioReturns):
+        returns = PortfolioReturns(returns)
+
+    samples = portfolio_pnl(returns.asset_returns, weights_matrix)
+    n_portfolios, n_days = samples.shape
+    if portfolio_names is None:
+        portfolio_names = range(n_portfolios)
+    elif len(portfolio_names) != n_portfolios:
+        raise ValueError("Le nombre de noms ne correspond pas au nombre de portefeuilles.")
+
+    results, errors = {}, {}
+    for name, cls in method_classes.items():
+        try:
+            results[name] = cls(returns, confidence_level)._var_rows(samples)
+        except Exception as error:
+            errors[name] = error
+
+    # Expected Shortfall historique : moyenne des `index` pires P&L de chaque portefeuille
+    index = int((1 - confidence_level) * n_days)
+    if index > 0:
+        results["Expected-Shortfall"] = -np.partition(samples, index, axis=1)[:, :index].mean(axis=1)
+
+    return pd.DataFrame(results, index=pd.Index(portfolio_names, name="portfolio")), errors
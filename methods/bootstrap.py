@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# bootstrap.py
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SCHEMES = ("iid", "stationary")
+
+
+def iid_indices(rng, n_obs, size):
+    """
+    Indices de rééchantillonnage iid (tirage avec remise), une ligne par réplication.
+    """
+    return rng.integers(0, n_obs, (size, n_obs))
+
+
+def stationary_block_indices(rng, n_obs, size, block_length):
+    """
+    Indices du bootstrap stationnaire de Politis & Romano, une ligne par réplication.
+
+    Chaque observation commence un nouveau bloc avec une probabilité 1 / block_length
+    (blocs de longueur géométrique, reprise circulaire en fin d'échantillon). Les
+    débuts de blocs sont propagés par un maximum cumulé : aucune boucle Python.
+    """
+    positions = np.arange(n_obs)
+    new_block = rng.random((size, n_obs)) < 1 / block_length
+    new_block[:, 0] = True
+    starts = rng.integers(0, n_obs, (size, n_obs))
+
+    # Position du début du bloc courant pour chaque observation
+    block_start = np.maximum.accumulate(np.where(new_block, positions, 0), axis=1)
+    first = np.take_along_axis(starts, block_start, axis=1)
+    return (first + positions - block_start) % n_obs
+
+
+def _bootstrap_chunk(instance, values, spec, chunk_index, size):
+    """
+    VaR et Expected Shortfall d'un bloc de réplications (fonction de module pour les
+    workers). Le générateur dérive de la graine racine et de l'indice du bloc : le
+    résultat ne dépend pas du nombre de workers.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(spec["seed"], spawn_key=(chunk_index,)))
+    if spec["scheme"] == "iid":
+        indices = iid_indices(rng, len(values), size)
+    else:
+        indices = stationary_block_indices(rng, len(values), size, spec["block_length"])
+
+    samples = values[indices]
+    var = instance._bootstrap_rows(samples)
+
+    index = int((1 - instance.confidence_level) * samples.shape[1])
+    if index > 0:
+        expected_shortfall = -np.partition(samples, index, axis=1)[:, :index].mean(axis=1)
+    else:
+        expected_shortfall = var
+    return var, expected_shortfall
+
+
+def _point_estimates(instance, values):
+    """
+    Estimations ponctuelles sur l'échantillon d'origine, avec les mêmes formules que
+    les réplications.
+    """
+    sample = values[np.newaxis, :]
+    var = float(instance._var_rows(sample)[0])
+    index = int((1 - instance.confidence_level) * len(values))
+    expected_shortfall = -float(np.sort(values)[:index].mean()) if index > 0 else var
+    return var, expected_shortfall
+
+
+def bootstrap_var(instance, n_replicates=1000, scheme="iid", block_length=None, interval=0.90,
+                  chunk_size=None, n_workers=None, seed=None):
+    """
+    Intervalles de confiance bootstrap de la VaR et de l'Expected Shortfall d'une méthode.
+
+    Les réplications sont formées par blocs de matrices d'indices (chunk_size x T) et
+    évaluées d'un coup par `_bootstrap_rows` (`_var_rows` par défaut). Les méthodes coûteuses (GARCH) répartissent les
+    blocs sur un pool de processus.
+
+    :param instance: Méthode de VaR supportant le calcul par lignes.
+    :param n_replicates: Nombre de réplications bootstrap.
+    :param scheme: "iid" ou "stationary" (blocs de Politis & Romano, qui préservent la
+                   dépendance temporelle ; à privilégier pour les méthodes GARCH).
+    :param block_length: Longueur moyenne des blocs (par défaut T^(1/3)).
+    :param interval: Niveau de l'intervalle de confiance (percentiles).
+    :param chunk_size: Nombre de réplications par bloc (par défaut 250, ou environ quatre
+                       blocs par worker avec un pool de processus).
+    :param n_workers: Nombre de processus (par défaut tous les cœurs pour les méthodes
+                      qui le demandent via BOOTSTRAP_IN_PROCESSES, sinon 1).
+    :param seed: Graine racine, pour des résultats reproductibles.
+    :return: Dictionnaire (estimations, bornes et erreurs standard de la VaR et de l'ES).
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Schéma de bootstrap inconnu : {scheme}. Choisir parmi {list(SCHEMES)}.")
+    if not 0 < interval < 1:
+        raise ValueError("Le niveau de l'intervalle doit être compris strictement entre 0 et 1.")
+
+    instance.validate_inputs()
+    values = np.asarray(instance.returns_data.values)
+    if block_length is None:
+        block_length = max(1.0, len(values) ** (1 / 3))
+    if n_workers is None:
+        n_workers = os.cpu_count() if instance.BOOTSTRAP_IN_PROCESSES else 1
+    if chunk_size is None:
+        chunk_size = math.ceil(n_replicates / (4 * n_workers)) if n_workers > 1 else 250
+
+    spec = {
+        "scheme": scheme,
+        "block_length": block_length,
+        "seed": seed if seed is not None else np.random.SeedSequence().entropy,
+    }
+    n_chunks = math.ceil(n_replicates / chunk_size)
+    sizes = [min(chunk_size, n_replicates - i * chunk_size) for i in range(n_chunks)]
+
+    if n_workers > 1 and n_chunks > 1:
+        with ProcessPoolExecutor(min(n_workers, n_chunks)) as pool:
+            futures = [
+                pool.submit(_bootstrap_chunk, instance, values, spec, i, size)
+                for i, size in enumerate(sizes)
+            ]
+            outputs = [future.result() for future in futures]
+    else:
+        outputs = [_bootstrap_chunk(instance, values, spec, i, size) for i, size in enumerate(sizes)]
+
+    var_replicates = np.concatenate([var for var, _ in outputs])
+    es_replicates = np.concatenate([es for _, es in outputs])
+    point_var, point_es = _point_estimates(instance, values)
+
+    bounds = [(1 - interval) / 2 * 100, (1 + interval) / 2 * 100]
+    var_lower, var_upper = np.nanpercentile(var_replicates, bounds)
+    es_lower, es_upper = np.nanpercentile(es_replicates, bounds)
+
+    return {
+        "method": type(instance).__name__,
+        "confidence_level": instance.confidence_level,
+        "scheme": scheme,
+        "n_replicates": n_replicates,
+        "interval": interval,
+        "var": point_var,
+        "var_lower": var_lower,
+        "var_upper": var_upper,
+        "var_standard_error": float(np.nanstd(var_replicates, ddof=1)),
+        "expected_shortfall": point_es,
+        "expected_shortfall_lower": es_lower,
+        "expected_shortfall_upper": es_upper,
+        "expected_shortfall_standard_error": float(np.nanstd(es_replicates, ddof=1)),
+    }
+
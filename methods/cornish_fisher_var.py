@@ -1,29 +1,25 @@
-import numpy as np
+from scipy import stats
 from .base_method import BaseVaRMethod
+from .online import cornish_fisher_z
 
 class CornishFisherVaR(BaseVaRMethod):
     """
     Implementation of Cornish-Fisher VaR method.
     """
 
-    def calculate_var(self):
+    def _calculate_var(self):
         """
         Calculate the VaR using the Cornish-Fisher approach.
         """
         self.validate_inputs()
 
-        z_score = np.abs(np.percentile(self.portfolio_returns, (1 - self.confidence_level) * 100))
-        skewness = self.portfolio_returns.skew()
-        kurtosis = self.portfolio_returns.kurtosis()
+        z_score = self._z_score()
+        skewness = self.returns_data.skew
+        kurtosis = self.returns_data.kurtosis
 
-        adjusted_z = (
-            z_score
-            + (1 / 6) * (z_score**2 - 1) * skewness
-            + (1 / 24) * (z_score**3 - 3 * z_score) * kurtosis
-            - (1 / 36) * (2 * z_score**3 - 5 * z_score) * (skewness**2)
-        )
+        adjusted_z = cornish_fisher_z(z_score, skewness, kurtosis)
 
-        var = adjusted_z * self.portfolio_returns.std() - self.portfolio_returns.mean()
+        var = adjusted_z * self.returns_data.std - self.returns_data.mean
 
         return {
             "method": "Cornish-Fisher",
@@ -33,3 +29,24 @@ class CornishFisherVaR(BaseVaRMethod):
             "adjusted_z": adjusted_z,
             "var": var,
         }
+
+    def _var_levels(self, levels):
+        z_score = self._levels_z_scores(levels)
+        skewness = self.returns_data.skew
+        kurtosis = self.returns_data.kurtosis
+
+        adjusted_z = cornish_fisher_z(z_score, skewness, kurtosis)
+
+        return adjusted_z * self.returns_data.std - self.returns_data.mean
+
+    def _var_rows(self, samples):
+        """
+        VaR de Cornish-Fisher de chaque ligne (mêmes estimateurs non biaisés que pandas).
+        """
+        z_score = self._row_z_scores(samples)
+        skewness = stats.skew(samples, axis=1, bias=False)
+        kurtosis = stats.kurtosis(samples, axis=1, bias=False)
+
+        adjusted_z = cornish_fisher_z(z_score, skewness, kurtosis)
+
+        return adjusted_z * samples.std(axis=1, ddof=1) - samples.mean(axis=1)
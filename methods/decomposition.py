@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# decomposition.py
+
+import numpy as np
+import pandas as pd
+
+
+def _decomposition_frame(weights, marginal, incremental, var, assets):
+    """
+    Tableau de décomposition par actif (VaR marginale, composante, incrémentale).
+    """
+    component = weights * marginal
+    return pd.DataFrame(
+        {
+            "weight": weights,
+            "marginal_var": marginal,
+            "component_var": component,
+            "component_pct": component / var if var else np.nan,
+            "incremental_var": incremental,
+        },
+        index=pd.Index(assets, name="asset"),
+    )
+
+
+def _gaussian_decomposition(asset_returns, weights, z_score, time_weights, demean, assets):
+    """
+    Décomposition analytique d'une VaR de la forme z * sigma_p - mu_p, à z fixé.
+
+    La covariance n'est jamais formée : Sigma w = X' (k * X w) et diag(Sigma) = k' X²
+    coûtent O(T x N), ce qui reste praticable pour des milliers d'actifs.
+    """
+    X = np.asarray(asset_returns, dtype=float)
+    mean = X.mean(axis=0) if demean else np.zeros(X.shape[1])
+    if demean:
+        X = X - mean
+
+    portfolio = X @ weights
+    sigma_w = X.T @ (time_weights * portfolio)
+    variances = time_weights @ (X * X)
+    sigma_p = np.sqrt(weights @ sigma_w)
+    mu_p = weights @ mean
+    var = z_score * sigma_p - mu_p
+
+    # Gradient de la VaR par rapport aux poids
+    marginal = z_score * sigma_w / sigma_p - mean
+
+    # VaR sans l'actif i, pour tous les actifs à la fois
+    variance_without = np.clip(sigma_p**2 - 2 * weights * sigma_w + weights**2 * variances, 0, None)
+    var_without = z_score * np.sqrt(variance_without) - (mu_p - weights * mean)
+
+    return _decomposition_frame(weights, marginal, var - var_without, var, assets)
+
+
+def parametric_decomposition(asset_returns, weights, z_score, assets=None):
+    """
+    VaR marginale, composante et incrémentale de la VaR paramétrique (gradients analytiques).
+
+    :param asset_returns: Rendements des actifs (T x N).
+    :param weights: Poids des actifs (N,).
+    :param z_score: Multiplicateur de l'écart-type utilisé par la méthode paramétrique.
+    :param assets: Noms des actifs.
+    :return: DataFrame indexé par actif ; les VaR composantes somment à la VaR du portefeuille.
+    """
+    T, N = np.shape(asset_returns)
+    time_weights = np.full(T, 1 / (T - 1))
+    return _gaussian_decomposition(asset_returns, weights, z_score, time_weights, True,
+                                   assets if assets is not None else range(N))
+
+
+def ewma_decomposition(asset_returns, weights, z_score, lambda_factor=0.94, assets=None):
+    """
+    Décomposition de la VaR RiskMetrics, avec la covariance EWMA de moyenne nulle
+    (mêmes pondérations temporelles que la récursion de RiskMetricsVaR).
+    """
+    T, N = np.shape(asset_returns)
+    time_weights = (1 - lambda_factor) * lambda_factor ** np.arange(T - 1, -1, -1)
+    time_weights[0] = lambda_factor ** (T - 1)
+    return _gaussian_decomposition(asset_returns, weights, z_score, time_weights, False,
+                                   assets if assets is not None else range(N))
+
+
+def scenario_decomposition(scenarios, weights, confidence_level, bandwidth=None, assets=None,
+                           chunk_size=256):
+    """
+    Décomposition par moyenne conditionnelle aux scénarios (historiques ou simulés).
+
+    La VaR marginale de l'actif i est -E[X_i | P&L du portefeuille = -VaR], estimée par la
+    moyenne sur les scénarios dont le rang encadre celui de la VaR (± bandwidth). La VaR
+    incrémentale est recalculée exactement sans chaque actif, par blocs d'actifs pour
+    borner la mémoire.
+
+    :param scenarios: Rendements des actifs par scénario (S x N).
+    :param weights: Poids des actifs (N,).
+    :param confidence_level: Niveau de confiance.
+    :param bandwidth: Demi-largeur (en rangs) de la fenêtre de conditionnement
+                      (par défaut 1 % des scénarios, au moins 1).
+    :param assets: Noms des actifs.
+    :param chunk_size: Nombre d'actifs traités à la fois pour la VaR incrémentale.
+    """
+    X = np.asarray(scenarios, dtype=float)
+    S, N = X.shape
+    index = int((1 - confidence_level) * S)
+    if bandwidth is None:
+        bandwidth = max(1, int(0.01 * S))
+
+    portfolio = X @ weights
+    order = np.argsort(portfolio)
+    var = -portfolio[order[index]]
+
+    band = order[max(index - bandwidth, 0): index + bandwidth + 1]
+    marginal = -X[band].mean(axis=0)
+
+    var_without = np.empty(N)
+    for start in range(0, N, chunk_size):
+        stop = min(start + chunk_size, N)
+        without = portfolio[:, np.newaxis] - X[:, start:stop] * weights[start:stop]
+        var_without[start:stop] = -np.partition(without, index, axis=0)[index]
+
+    return _decomposition_frame(weights, marginal, var - var_without, var,
+                                assets if assets is not None else range(N))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# executor.py
+
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from monitoring.instrumentation import measured
+
+
+def _run_method(instance, confidence_levels=None):
+    """
+    Calcule la VaR d'une instance (fonction de module pour rester sérialisable).
+    """
+    if confidence_levels is None:
+        return instance.calculate_var()
+    return instance.calculate_var(confidence_levels)
+
+
+def _run_instrumented(instrumentation, name, instance, confidence_levels=None):
+    """
+    Calcule une méthode dans un thread worker en enregistrant sa durée, son temps CPU
+    (du thread) et son pic mémoire.
+    """
+    with instrumentation.stage("method", cpu_clock=time.thread_time, method=name):
+        return _run_method(instance, confidence_levels)
+
+
+class MethodExecutor:
+    """
+    Exécute des méthodes de VaR indépendantes en parallèle.
+
+    Chaque méthode est calculée exactement une fois. Une erreur dans une méthode est
+    enregistrée pour cette méthode sans interrompre le reste du lot.
+    """
+
+    # Intervalle (en secondes) de vérification de la demande d'annulation
+    CANCEL_POLL_INTERVAL = 0.1
+
+    BACKENDS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+    def __init__(self, max_workers=None, backend="thread"):
+        """
+        :param max_workers: Nombre maximal de workers (par défaut celui du pool).
+        :param backend: "thread" ou "process". Le mode "process" contourne le GIL pour
+                        les ajustements GARCH mais exige des instances sérialisables.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend inconnu : {backend}. Choisir parmi {list(self.BACKENDS)}.")
+        self.max_workers = max_workers
+        self.backend = backend
+
+    def run(self, var_methods, confidence_levels=None, instrumentation=None, on_result=None,
+            cancel_event=None):
+        """
+        Calcule toutes les méthodes fournies.
+
+        :param var_methods: Dictionnaire {nom de la méthode: instance}.
+        :param confidence_levels: Séquence optionnelle de niveaux de confiance calculés
+                                  en une passe par chaque méthode.
+        :param instrumentation: Instrumentation optionnelle recevant un enregistrement par
+                                méthode (mesuré dans le worker ; sans pic mémoire en mode
+                                "process").
+        :param on_result: Fonction appelée `on_result(nom, résultat, erreur)` dès qu'une
+                          méthode se termine (les plus rapides d'abord), dans le thread
+                          appelant.
+        :param cancel_event: threading.Event ; lorsqu'il est positionné, les méthodes pas
+                             encore démarrées sont annulées et celles en cours ne sont plus
+                             attendues. Les méthodes non terminées sont reportées dans les
+                             erreurs avec CancelledError.
+        :return: Tuple (résultats, erreurs), deux dictionnaires indexés par nom de méthode.
+        """
+        if not var_methods:
+            return {}, {}
+
+        results, errors = {}, {}
+        pool = self.BACKENDS[self.backend](max_workers=self.max_workers)
+        cancelled = False
+        try:
+            futures = {
+                self._submit(pool, name, instance, confidence_levels, instrumentation): name
+                for name, instance in var_methods.items()
+            }
+            pending = set(futures)
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+                timeout = self.CANCEL_POLL_INTERVAL if cancel_event is not None else None
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors[name] = e
+                        if on_result is not None:
+                            on_result(name, None, e)
+                        continue
+                    if instrumentation is not None and self.backend == "process":
+                        result, wall_seconds, cpu_seconds = result
+                        instrumentation.add_record("method", wall_seconds, cpu_seconds, method=name)
+                    results[name] = result
+                    if on_result is not None:
+                        on_result(name, result, None)
+
+            for future in pending:
+                errors[futures[future]] = CancelledError()
+        finally:
+            # Après une annulation, ne pas attendre les méthodes encore en cours
+            pool.shutdown(wait=not cancelled, cancel_futures=cancelled)
+
+        # Conserver l'ordre de sélection des méthodes
+        results = {name: results[name] for name in var_methods if name in results}
+        return results, errors
+
+    def _submit(self, pool, name, instance, confidence_levels, instrumentation):
+        if instrumentation is None:
+            return pool.submit(_run_method, instance, confidence_levels)
+        if self.backend == "process":
+            # L'instrumentation du processus parent n'est pas accessible depuis le worker
+            return pool.submit(measured, _run_method, instance, confidence_levels)
+        return pool.submit(_run_instrumented, instrumentation, name, instance, confidence_levels)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# garch_cache.py
+
+import hashlib
+import logging
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+from arch import arch_model
+
+logger = logging.getLogger(__name__)
+
+# Persistance (somme des alpha et beta) au-delà de laquelle un ajustement démarré à chaud
+# est jugé dégénéré (quasi intégré) et refait à froid
+MAX_WARM_PERSISTENCE = 0.999
+
+
+def plausible_garch_params(params, values, p=1, q=1):
+    """
+    Indique si les paramètres (mu, omega, alpha[1..p], beta[1..q]) d'un GARCH sont
+    admissibles : moyenne dans l'étendue des données, omega > 0, coefficients positifs
+    et persistance strictement inférieure à MAX_WARM_PERSISTENCE.
+    """
+    params = np.asarray(params, dtype=float)
+    mu, omega, coefficients = params[0], params[1], params[2:2 + p + q]
+    return bool(
+        np.all(np.isfinite(params))
+        and values.min() <= mu <= values.max()
+        and omega > 0
+        and np.all(coefficients >= 0)
+        and coefficients.sum() < MAX_WARM_PERSISTENCE
+    )
+
+
+def fit_model(values, p=1, q=1, vol="Garch", starting_values=None):
+    """
+    Ajuste un modèle GARCH, en partant de `starting_values` si fournis.
+
+    Un démarrage à chaud peut conduire l'optimiseur vers un optimum dégénéré : s'il ne
+    converge pas ou si les paramètres obtenus ne sont pas admissibles, le modèle est
+    réajusté à froid (valeurs initiales d'arch).
+    """
+    model = arch_model(values, vol=vol, p=p, q=q)
+    if starting_values is not None:
+        # Échec signalé par convergence_flag ; arch modifie les filtres globaux d'avertissements
+        with warnings.catch_warnings():
+            fitted_model = model.fit(disp="off", starting_values=starting_values, show_warning=False)
+        if fitted_model.convergence_flag == 0 and (
+            vol != "Garch" or plausible_garch_params(fitted_model.params.values, values, p, q)
+        ):
+            return fitted_model
+        logger.debug("Warm-started GARCH fit rejected, refitting from arch's starting values")
+    return model.fit(disp="off")
+
+
+class GARCHFitCache:
+    """
+    Cache des modèles GARCH ajustés, partagé par toutes les méthodes d'une exécution.
+
+    Un ajustement est identifié par le contenu des rendements et la spécification du
+    modèle : GARCHVaR, TVEGarchVaR et les instances créées par OptimalVaR réutilisent
+    donc le même ajustement. Sur demande (`warm_start=True`), lorsque la fenêtre de
+    données avance d'un jour (ou qu'un rendement est ajouté), le nouvel ajustement part
+    des paramètres précédents, puis est refait à froid s'il ne converge pas ou sort des
+    bornes (voir `fit_model`). Par défaut, chaque ajustement part des valeurs initiales
+    d'arch : le résultat ne dépend pas des ajustements faits auparavant.
+
+    Trois zones sont gérées séparément (éviction LRU dans chacune) : les ajustements
+    épinglés (échantillon complet d'une méthode), les autres ajustements isolés, et les
+    volatilités de fenêtres glissantes, conservées en un seul vecteur par série. Un
+    calcul glissant sur T fenêtres n'évince donc ni l'ajustement sur l'échantillon
+    complet ni les autres ajustements, et GARCHVaR et TVEGarchVaR le partagent.
+    """
+
+    def __init__(self, max_entries=64, max_pinned=8, max_rolling=8):
+        """
+        :param max_entries: Nombre maximal d'ajustements isolés conservés.
+        :param max_pinned: Nombre maximal d'ajustements épinglés conservés.
+        :param max_rolling: Nombre maximal de séries de volatilités glissantes conservées.
+        """
+        self.max_entries = max_entries
+        self.max_pinned = max_pinned
+        self.max_rolling = max_rolling
+        self._fits = OrderedDict()
+        self._pinned = OrderedDict()
+        self._rolling = OrderedDict()
+        self._last_fit = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def _key(values, spec):
+        return hashlib.sha1(values.tobytes()).hexdigest(), len(values), spec
+
+    def _get_or_compute(self, store, max_size, key, compute):
+        """
+        Valeur de `store` pour cette clé, calculée une seule fois même si plusieurs
+        méthodes la demandent en parallèle.
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in store:
+                    store.move_to_end(key)
+                    return store[key]
+
+            value = compute()
+
+            with self._lock:
+                store[key] = value
+                while len(store) > max_size:
+                    evicted, _ = store.popitem(last=False)
+                    self._key_locks.pop(evicted, None)
+        return value
+
+    def fit(self, returns, p=1, q=1, vol="Garch", starting_values=None, warm_start=False, pin=False):
+        """
+        Retourne le modèle ajusté pour ces rendements, en ne l'ajustant qu'une seule fois.
+
+        :param returns: Rendements du portefeuille (1D).
+        :param p: Ordre des innovations retardées.
+        :param q: Ordre des volatilités retardées.
+        :param vol: Modèle de volatilité passé à `arch_model`.
+        :param starting_values: Paramètres initiaux (vérifiés, voir `fit_model`).
+        :param warm_start: Sans `starting_values`, partir des paramètres du dernier
+                           ajustement si la fenêtre n'a avancé que d'un jour.
+        :param pin: Conserver l'ajustement hors de l'éviction des ajustements isolés
+                    (ajustement sur l'échantillon complet, réutilisé par plusieurs méthodes).
+        :return: ARCHModelResult.
+        """
+        values = np.ascontiguousarray(returns, dtype=float)
+        spec = (vol, p, q)
+        key = self._key(values, spec)
+
+        with self._lock:
+            if pin and key in self._fits:
+                self._pinned[key] = self._fits.pop(key)
+            for store in (self._pinned, self._fits):
+                if key in store:
+                    store.move_to_end(key)
+                    return store[key]
+
+        def compute():
+            initial = starting_values
+            if initial is None and warm_start:
+                with self._lock:
+                    initial = self._warm_start(spec, values)
+            fitted_model = fit_model(values, p=p, q=q, vol=vol, starting_values=initial)
+            with self._lock:
+                self._last_fit[spec] = (values, fitted_model.params.values)
+            return fitted_model
+
+        if pin:
+            return self._get_or_compute(self._pinned, self.max_pinned, key, compute)
+        return self._get_or_compute(self._fits, self.max_entries, key, compute)
+
+    def rolling_volatility(self, source, window, step=1, p=1, q=1, vol="Garch"):
+        """
+        Volatilité conditionnelle prévue à un jour sur chaque fenêtre glissante de
+        `source`, chaque fenêtre étant ajustée à froid.
+
+        :param source: Série dont les fenêtres sont source[i * step : i * step + window].
+        :return: np.ndarray, une volatilité par fenêtre.
+        """
+        values = np.ascontiguousarray(source, dtype=float)
+        spec = (vol, p, q)
+        key = ("rolling", window, step) + self._key(values, spec)
+
+        def compute():
+            windows = np.lib.stride_tricks.sliding_window_view(values, window)[::step]
+            volatility = np.empty(len(windows))
+            for i, sample in enumerate(windows):
+                fitted_model = fit_model(sample, p=p, q=q, vol=vol)
+                volatility[i] = np.sqrt(fitted_model.forecast(horizon=1).variance.values[-1, 0])
+            volatility.flags.writeable = False
+            return volatility
+
+        return self._get_or_compute(self._rolling, self.max_rolling, key, compute)
+
+    def _warm_start(self, spec, values):
+        """
+        Paramètres du dernier ajustement de même spécification si les nouvelles données
+        en sont le prolongement d'un jour (fenêtre glissante ou rendement ajouté).
+        """
+        if spec not in self._last_fit:
+            return None
+        previous, params = self._last_fit[spec]
+        if len(values) == len(previous) and np.array_equal(values[:-1], previous[1:]):
+            return params
+        if len(values) == len(previous) + 1 and np.array_equal(values[:-1], previous):
+            return params
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._fits.clear()
+            self._pinned.clear()
+            self._rolling.clear()
+            self._last_fit.clear()
+            self._key_locks.clear()
+
+
+# Cache par défaut, partagé par toutes les méthodes GARCH du processus
+garch_cache = GARCHFitCache()
+
+
+def fit_garch(returns, p=1, q=1, vol="Garch", starting_values=None, warm_start=False, pin=False):
+    """
+    Ajuste (ou récupère depuis le cache partagé) un modèle GARCH sur les rendements.
+    """
+    return garch_cache.fit(returns, p=p, q=q, vol=vol, starting_values=starting_values,
+                           warm_start=warm_start, pin=pin)
@@ -1,32 +1,94 @@
-from arch import arch_model
 import numpy as np
+import pandas as pd
 from .base_method import BaseVaRMethod
+from .garch_cache import GARCHFitCache, fit_garch, garch_cache
 
 class GARCHVaR(BaseVaRMethod):
     """
     Implementation of GARCH VaR method.
     """
 
-    def calculate_var(self):
+    # Un ajustement par réplication : le bootstrap est réparti sur plusieurs processus
+    BOOTSTRAP_IN_PROCESSES = True
+
+    def _calculate_var(self):
         """
         Calculate the VaR using a GARCH(1,1) model.
         """
         self.validate_inputs()
 
-        # Fit a GARCH(1,1) model
-        model = arch_model(self.portfolio_returns, vol="Garch", p=1, q=1)
-        fitted_model = model.fit(disp="off")
-
-        forecast = fitted_model.forecast(horizon=1)
-        conditional_volatility = forecast.variance.values[-1, 0]
+        # Fit a GARCH(1,1) model (shared with the other GARCH-based methods of the run)
+        conditional_volatility = self._conditional_volatility()
 
-        z_score = np.abs(np.percentile(self.portfolio_returns, (1 - self.confidence_level) * 100))
-        var = z_score * np.sqrt(conditional_volatility)
+        z_score = self._z_score()
+        var = z_score * conditional_volatility
 
         return {
             "method": "GARCH",
             "confidence_level": self.confidence_level,
-            "conditional_volatility": np.sqrt(conditional_volatility),
+            "conditional_volatility": conditional_volatility,
             "z_score": z_score,
             "var": var,
         }
+
+    def _conditional_volatility(self):
+        """
+        Volatilité conditionnelle prévue à un jour (ajustement partagé via le cache, épinglé
+        pour que les calculs glissants ou par portefeuille ne l'évincent pas).
+        """
+        fitted_model = fit_garch(self.returns_data.values, p=1, q=1, pin=True)
+        return np.sqrt(fitted_model.forecast(horizon=1).variance.values[-1, 0])
+
+    def _var_levels(self, levels):
+        return self._levels_z_scores(levels) * self._conditional_volatility()
+
+    def _rows_conditional_volatility(self, samples, cache=garch_cache):
+        """
+        Volatilité conditionnelle prévue à un jour pour chaque ligne.
+        Chaque ligne est ajustée à froid, comme un ajustement isolé de la fenêtre : partir
+        des paramètres de la fenêtre précédente propagerait un optimum dégénéré à toutes
+        les fenêtres suivantes (voir benchmarks/rolling_garch.py). Les fenêtres glissantes
+        d'une même série sont conservées en un seul vecteur, partagé entre méthodes GARCH.
+
+        :param cache: Cache des ajustements (par défaut celui partagé par le processus).
+        """
+        sliding = self._sliding_source(samples, min_window=2)
+        if sliding is not None:
+            source, step = sliding
+            return cache.rolling_volatility(source, samples.shape[1], step, p=1, q=1)
+
+        volatility = np.empty(len(samples))
+        for i, sample in enumerate(samples):
+            fitted_model = cache.fit(sample, p=1, q=1)
+            volatility[i] = np.sqrt(fitted_model.forecast(horizon=1).variance.values[-1, 0])
+        return volatility
+
+    def _rows_scale(self, samples):
+        """
+        Facteur appliqué à la volatilité conditionnelle de chaque ligne (quantile empirique).
+        """
+        return self._row_z_scores(samples)
+
+    def _var_rows(self, samples, cache=garch_cache):
+        return self._rows_scale(samples) * self._rows_conditional_volatility(samples, cache)
+
+    def backtest_forecasts(self, window, step=1):
+        """
+        Prévisions glissantes pour le backtesting, sans un ajustement par fenêtre : le GARCH
+        est ajusté une fois sur l'échantillon complet (ajustement partagé) et la variance
+        conditionnelle filtrée de chaque date, qui ne dépend que des rendements
+        antérieurs, remplace la prévision de la fenêtre. Les paramètres étant estimés sur
+        tout l'échantillon, `rolling_var` reste la référence hors échantillon.
+        """
+        windows, index = self._rolling_windows(window, step)
+        fitted_model = fit_garch(self.returns_data.values, p=1, q=1, pin=True)
+        volatility = np.asarray(fitted_model.conditional_volatility)[window::step]
+        return pd.Series(self._rows_scale(windows) * volatility, index=index, name=type(self).__name__)
+
+    def _bootstrap_rows(self, samples):
+        """
+        Réplications ajustées dans un cache privé : jamais réutilisées, elles évinceraient
+        du cache partagé les ajustements des autres méthodes et fausseraient leur
+        démarrage à chaud.
+        """
+        return self._var_rows(samples, GARCHFitCache(max_entries=1))
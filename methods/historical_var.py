@@ -1,19 +1,21 @@
 import numpy as np
 from .base_method import BaseVaRMethod
+from .decomposition import scenario_decomposition
+from .online import rolling_order_statistics
 
 class HistoricalVaR(BaseVaRMethod):
     """
     Implementation of Historical VaR method.
     """
 
-    def calculate_var(self):
+    def _calculate_var(self):
         """
         Calculate the VaR using the Historical approach.
         """
         self.validate_inputs()
 
-        # Sort the returns to calculate the percentile
-        sorted_returns = np.sort(self.portfolio_returns)
+        # Sorted returns are computed once and shared between methods
+        sorted_returns = self.returns_data.sorted
         index = int((1 - self.confidence_level) * len(sorted_returns))
         var = -sorted_returns[index]  # VaR is typically positive
 
@@ -22,3 +24,34 @@ class HistoricalVaR(BaseVaRMethod):
             "confidence_level": self.confidence_level,
             "var": var,
         }
+
+    def _var_levels(self, levels):
+        sorted_returns = self.returns_data.sorted
+        index = ((1 - levels) * len(sorted_returns)).astype(int)
+        return -sorted_returns[index]
+
+    def _var_rows(self, samples):
+        """
+        VaR historique de chaque ligne : fenêtre triée glissante pour les fenêtres de
+        `rolling_var`, sélection partielle (au lieu d'un tri complet) sinon.
+        """
+        index = int((1 - self.confidence_level) * samples.shape[1])
+        sliding = self._sliding_source(samples)
+        if sliding is not None:
+            series, step = sliding
+            quantiles, _ = rolling_order_statistics(series, samples.shape[1], index, step=step)
+            return -quantiles
+        return -np.partition(samples, index, axis=1)[:, index]
+
+    def decompose(self, bandwidth=None):
+        """
+        VaR marginale, composante et incrémentale de chaque actif, par moyenne des
+        rendements historiques conditionnelle au scénario de VaR.
+
+        :param bandwidth: Demi-largeur (en rangs) de la fenêtre autour du scénario de VaR.
+        """
+        self.validate_inputs()
+        return scenario_decomposition(
+            self.returns_data.asset_returns, self._asset_weights(), self.confidence_level,
+            bandwidth, self._asset_names(),
+        )
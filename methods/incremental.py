@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# incremental.py
+
+import json
+import math
+import os
+
+import numpy as np
+
+from backtesting.engine import IncrementalBacktest
+from .online import EWMAVariance, SortedWindow
+
+
+class IncrementalVaR:
+    """
+    Mise à jour de fin de journée des VaR et de leur backtesting.
+
+    L'état est initialisé une fois sur l'historique (mêmes formules que les méthodes en
+    lot, backtesting amorcé en rejouant les mises à jour), puis chaque nouveau rendement
+    le met à jour sans rien recalculer :
+
+    - Historical : fenêtre triée, insertion (et retrait du plus ancien) en O(log n) ;
+    - Risk-Metrics : récursion EWMA en O(1) ;
+    - GARCH : variance prévue à un jour par la récursion GARCH(1,1) avec les paramètres
+      stockés, réajustement optionnel périodique partant de ces paramètres ;
+    - backtesting : comptes de violations et de transitions prolongés d'un jour.
+
+    L'état se sauvegarde en JSON entre deux exécutions (`save` / `load`).
+    """
+
+    METHODS = ("Historical", "Risk-Metrics", "GARCH")
+
+    def __init__(self, confidence_level=0.95, methods=METHODS, lambda_factor=0.94, window=None,
+                 garch_refit_every=None):
+        """
+        :param confidence_level: Niveau de confiance pour la VaR.
+        :param methods: Méthodes à maintenir (noms de METHODS).
+        :param lambda_factor: Facteur de décroissance EWMA pour Risk-Metrics.
+        :param window: Taille de la fenêtre glissante des rendements (None : tout l'historique).
+        :param garch_refit_every: Réajuster le GARCH tous les n jours (None : jamais, seule
+                                  la récursion de variance est appliquée).
+        """
+        unknown = set(methods) - set(self.METHODS)
+        if unknown:
+            raise ValueError(f"Méthodes non supportées en mise à jour incrémentale : {sorted(unknown)}")
+
+        self.confidence_level = confidence_level
+        self.methods = tuple(methods)
+        self.lambda_factor = lambda_factor
+        self.garch_refit_every = garch_refit_every
+        self.window = SortedWindow(size=window)
+        self.ewma = EWMAVariance(lambda_factor)
+        self.garch_params = None
+        self.garch_variance = None
+        self.days_since_fit = 0
+        self.backtest = IncrementalBacktest(self.methods, [confidence_level])
+        self.last_date = None
+        self.scope = None
+        self.var = {}
+
+    @classmethod
+    def from_history(cls, returns, last_date=None, backtest_window=250, **kwargs):
+        """
+        Initialise l'état sur un historique de rendements du portefeuille.
+
+        Les `backtest_window` premiers rendements initialisent les estimateurs ; les
+        suivants sont rejoués par `update`. Le backtesting est ainsi amorcé avec les
+        prévisions mêmes des mises à jour quotidiennes (un seul ajustement GARCH, dont
+        les paramètres servent à la récursion de variance sur tout l'historique).
+
+        :param returns: Rendements du portefeuille (1D), dans l'ordre chronologique.
+        :param last_date: Date du dernier rendement de l'historique.
+        :param backtest_window: Nombre de rendements avant la première prévision
+                                backtestée (sans plus d'historique, le backtesting
+                                part de zéro).
+        """
+        state = cls(**kwargs)
+        values = np.asarray(returns, dtype=float)
+        start = min(backtest_window, len(values))
+        state.window = SortedWindow(values[:start], state.window.size)
+
+        if "Risk-Metrics" in state.methods:
+            from .risk_metrics_var import ewma_volatility
+
+            state.ewma.variance = float(ewma_volatility(values[:start], state.lambda_factor)[-1] ** 2)
+        if "GARCH" in state.methods:
+            # Paramètres ajustés sur la fenêtre finale, variance filtrée depuis le début
+            fitted_model = state._fit_garch(values[-state.window.size:] if state.window.size else values)
+            mu, omega, alpha, beta = state.garch_params
+            state.garch_variance = float(np.var(values[:start]))
+            for value in values[:start]:
+                state.garch_variance = omega + alpha * (value - mu) ** 2 + beta * state.garch_variance
+
+        state.var = state.calculate_var()
+        garch_refit_every, state.garch_refit_every = state.garch_refit_every, None
+        for value in values[start:]:
+            state.update(value)
+        state.garch_refit_every = garch_refit_every
+
+        if "GARCH" in state.methods:
+            state.garch_variance = float(fitted_model.forecast(horizon=1).variance.values[-1, 0])
+            state.days_since_fit = 0
+        state.last_date = None if last_date is None else str(last_date)
+        state.var = state.calculate_var()
+        return state
+
+    def _fit_garch(self, values=None):
+        """
+        Ajuste le GARCH(1,1) sur la fenêtre (ou sur `values`), en partant des paramètres
+        stockés s'il y en a.
+
+        :return: ARCHModelResult.
+        """
+        from .garch_cache import fit_garch
+
+        values = np.asarray(self.window.values) if values is None else values
+        fitted_model = fit_garch(values, p=1, q=1, starting_values=self.garch_params)
+        self.garch_params = [float(value) for value in fitted_model.params.values]
+        self.garch_variance = float(fitted_model.forecast(horizon=1).variance.values[-1, 0])
+        self.days_since_fit = 0
+        return fitted_model
+
+    def update(self, return_, date=None):
+        """
+        Intègre le rendement réalisé d'un jour.
+
+        Le rendement est d'abord confronté aux VaR prévues la veille (backtesting), puis
+        intégré aux estimateurs.
+
+        :return: Dictionnaire {méthode: VaR prévue pour le jour suivant}.
+        """
+        return_ = float(return_)
+        self.backtest.update(return_, [self.var[method] for method in self.methods])
+
+        self.window.append(return_)
+        if "Risk-Metrics" in self.methods:
+            self.ewma.update(return_)
+        if "GARCH" in self.methods:
+            mu, omega, alpha, beta = self.garch_params
+            self.garch_variance = omega + alpha * (return_ - mu) ** 2 + beta * self.garch_variance
+            self.days_since_fit += 1
+            if self.garch_refit_every and self.days_since_fit >= self.garch_refit_every:
+                self._fit_garch()
+
+        if date is not None:
+            self.last_date = str(date)
+        self.var = self.calculate_var()
+        return self.var
+
+    def calculate_var(self):
+        """
+        VaR courante de chaque méthode, avec les mêmes formules que les méthodes en lot.
+
+        :return: Dictionnaire {méthode: VaR}.
+        """
+        results = {}
+        if "Historical" in self.methods:
+            results["Historical"] = -self.window[int((1 - self.confidence_level) * len(self.window))]
+
+        if {"Risk-Metrics", "GARCH"} & set(self.methods):
+            z_score = abs(self.window.percentile((1 - self.confidence_level) * 100))
+            if "Risk-Metrics" in self.methods:
+                results["Risk-Metrics"] = z_score * self.ewma.volatility
+            if "GARCH" in self.methods:
+                results["GARCH"] = z_score * math.sqrt(self.garch_variance)
+
+        return results
+
+    def backtest_results(self):
+        """
+        Tests de couverture sur les jours intégrés depuis l'initialisation.
+
+        :return: DataFrame indexé par (method, confidence_level).
+        """
+        return self.backtest.run()
+
+    def to_dict(self):
+        return {
+            "confidence_level": self.confidence_level,
+            "methods": list(self.methods),
+            "lambda_factor": self.lambda_factor,
+            "window_size": self.window.size,
+            "garch_refit_every": self.garch_refit_every,
+            "window": self.window.values,
+            "ewma_variance": self.ewma.variance,
+            "garch_params": self.garch_params,
+            "garch_variance": self.garch_variance,
+            "days_since_fit": self.days_since_fit,
+            "backtest": self.backtest.to_dict(),
+            "last_date": self.last_date,
+            "scope": self.scope,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        incremental = cls(
+            state["confidence_level"], state["methods"], state["lambda_factor"],
+            state["window_size"], state["garch_refit_every"],
+        )
+        incremental.window = SortedWindow(state["window"], state["window_size"])
+        incremental.ewma.variance = state["ewma_variance"]
+        incremental.garch_params = state["garch_params"]
+        incremental.garch_variance = state["garch_variance"]
+        incremental.days_since_fit = state["days_since_fit"]
+        incremental.backtest = IncrementalBacktest.from_dict(state["backtest"])
+        incremental.last_date = state["last_date"]
+        incremental.scope = state["scope"]
+        incremental.var = incremental.calculate_var()
+        return incremental
+
+    def save(self, path):
+        """
+        Écrit l'état en JSON (remplacement atomique du fichier).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,299 @@
+import math
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+from scipy.stats import qmc
+
+from .base_method import BaseVaRMethod
+from .decomposition import _decomposition_frame
+
+
+def covariance_factor(covariance):
+    """
+    Facteur L tel que L L' = covariance (Cholesky, ou décomposition spectrale si la
+    matrice n'est que semi-définie positive, par ex. plus d'actifs que d'observations).
+    """
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def simulate_scenarios(spec, chunk_index, size):
+    """
+    Simule un bloc de scénarios de rendements des actifs (size x n_actifs).
+
+    Le générateur de chaque bloc dérive de la graine racine et de l'indice du bloc :
+    le résultat ne dépend ni du nombre de workers ni de l'ordre d'exécution.
+    """
+    mean, factor = spec["mean"], spec["factor"]
+    n_assets = len(mean)
+    innovations = spec["innovations"]
+    variance_reduction = spec["variance_reduction"]
+    rng = np.random.default_rng(np.random.SeedSequence(spec["seed"], spawn_key=(chunk_index,)))
+
+    if innovations == "bootstrap":
+        history = spec["history"]
+        half = size // 2 if variance_reduction == "antithetic" else size
+        scenarios = history[rng.integers(0, len(history), half)]
+        if variance_reduction == "antithetic":
+            # Scénarios miroirs autour de la moyenne historique
+            scenarios = np.concatenate([scenarios, 2 * mean - scenarios])
+        return scenarios
+
+    if variance_reduction == "sobol":
+        # Une seule suite de Sobol brouillée, découpée en blocs consécutifs
+        sampler = qmc.Sobol(d=n_assets + 1, scramble=True, seed=spec["seed"])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            if chunk_index > 0:
+                sampler.fast_forward(chunk_index * spec["chunk_size"])
+            uniforms = sampler.random(size)
+        uniforms = np.clip(uniforms, 1e-12, 1 - 1e-12)
+        z = stats.norm.ppf(uniforms[:, :n_assets])
+        chi_square = stats.chi2.ppf(uniforms[:, n_assets], spec["df"])
+    else:
+        half = size // 2 if variance_reduction == "antithetic" else size
+        z = rng.standard_normal((half, n_assets))
+        chi_square = rng.chisquare(spec["df"], half) if innovations == "student-t" else None
+        if variance_reduction == "antithetic":
+            z = np.concatenate([z, -z])
+            if chi_square is not None:
+                chi_square = np.concatenate([chi_square, chi_square])
+
+    if innovations == "student-t":
+        # Loi de Student multivariée, normalisée à variance unitaire
+        df = spec["df"]
+        z = z * np.sqrt((df - 2) / chi_square)[:, np.newaxis]
+
+    return mean + z @ factor.T
+
+
+def _simulate_tail(spec, chunk_index, size):
+    """
+    Simule un bloc et n'en conserve que la queue gauche du P&L du portefeuille,
+    ainsi que la VaR du bloc (pour l'erreur standard par moyennes de blocs).
+    """
+    pnl = simulate_scenarios(spec, chunk_index, size) @ spec["weights"]
+    index = int(spec["alpha"] * len(pnl))
+    tail_size = min(spec["tail_size"], len(pnl))
+    tail = np.partition(pnl, tail_size - 1)[:tail_size]
+    chunk_var = -np.partition(tail, index)[index]
+    return tail, chunk_var, len(pnl)
+
+
+def _band_sums(spec, chunk_index, size, lower, upper):
+    """
+    Rejoue un bloc (même graine) et somme les scénarios d'actifs dont le P&L du
+    portefeuille tombe dans [lower, upper].
+    """
+    scenarios = simulate_scenarios(spec, chunk_index, size)
+    pnl = scenarios @ spec["weights"]
+    in_band = (pnl >= lower) & (pnl <= upper)
+    return scenarios[in_band].sum(axis=0), int(in_band.sum())
+
+
+class MonteCarloVaR(BaseVaRMethod):
+    """
+    Implementation of Monte Carlo VaR method.
+
+    Les scénarios multi-actifs sont simulés par blocs de taille fixe et agrégés au fil
+    de l'eau : seule la queue gauche du P&L est conservée entre deux blocs, si bien
+    que des millions de trajectoires ne résident jamais en mémoire en même temps.
+    """
+
+    # Nombre minimal de blocs avant d'évaluer l'erreur standard pour un arrêt anticipé
+    MIN_CHUNKS_FOR_STOP = 5
+
+    def __init__(self, portfolio_returns, confidence_level=0.95, weights=None, n_paths=100_000,
+                 chunk_size=50_000, innovations="student-t", df=5, variance_reduction=None,
+                 target_standard_error=None, n_workers=1, seed=None):
+        """
+        Initialize the Monte Carlo VaR method.
+
+        :param portfolio_returns: Rendements des actifs (2D) ou PortfolioReturns partagé.
+        :param confidence_level: Confidence level for VaR calculation (default: 0.95).
+        :param weights: Poids des actifs (par défaut égalité entre les actifs).
+        :param n_paths: Nombre maximal de trajectoires simulées.
+        :param chunk_size: Nombre de trajectoires par bloc.
+        :param innovations: "normal", "student-t" ou "bootstrap" (tirage des rendements historiques).
+        :param df: Degrés de liberté des innovations de Student (> 2).
+        :param variance_reduction: None, "antithetic" ou "sobol" (quasi-aléatoire).
+        :param target_standard_error: Arrêt anticipé dès que l'erreur standard de la VaR
+                                      passe sous ce seuil (None : toutes les trajectoires).
+        :param n_workers: Nombre de processus de simulation (1 : dans le processus courant).
+        :param seed: Graine racine, pour des résultats reproductibles.
+        """
+        super().__init__(portfolio_returns, confidence_level, weights)
+        if innovations not in ("normal", "student-t", "bootstrap"):
+            raise ValueError(f"Innovations inconnues : {innovations}")
+        if variance_reduction not in (None, "antithetic", "sobol"):
+            raise ValueError(f"Réduction de variance inconnue : {variance_reduction}")
+        if variance_reduction == "sobol" and innovations == "bootstrap":
+            raise ValueError("La suite de Sobol ne s'applique pas au bootstrap.")
+        if innovations == "student-t" and df <= 2:
+            raise ValueError("Les innovations de Student exigent df > 2.")
+
+        self.n_paths = n_paths
+        self.chunk_size = chunk_size
+        self.innovations = innovations
+        self.df = df
+        self.variance_reduction = variance_reduction
+        self.target_standard_error = target_standard_error
+        self.n_workers = n_workers
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+
+    def simulation_spec(self, tail_confidence_level=None):
+        """
+        Paramètres (sérialisables) transmis aux workers de simulation.
+
+        :param tail_confidence_level: Plus faible niveau de confiance à lire dans la queue
+                                      conservée (par défaut celui de l'instance).
+        """
+        if tail_confidence_level is None:
+            tail_confidence_level = self.confidence_level
+        self.validate_inputs()
+        asset_returns = self.returns_data.asset_returns
+        covariance = np.atleast_2d(np.cov(asset_returns, rowvar=False))
+
+        return {
+            "mean": asset_returns.mean(axis=0),
+            "factor": covariance_factor(covariance),
+            "weights": self._asset_weights(),
+            "history": np.asarray(asset_returns) if self.innovations == "bootstrap" else None,
+            "innovations": self.innovations,
+            "df": self.df,
+            "variance_reduction": self.variance_reduction,
+            "seed": self.seed,
+            "chunk_size": self.chunk_size,
+            "alpha": 1 - self.confidence_level,
+            # Marge au-delà de la VaR pour la fenêtre de conditionnement de `decompose`
+            "tail_size": int((1 - tail_confidence_level) * self.n_paths) + 1 + self._bandwidth(),
+        }
+
+    def _bandwidth(self):
+        return max(1, int(0.001 * self.n_paths))
+
+    def _chunk_sizes(self):
+        n_chunks = math.ceil(self.n_paths / self.chunk_size)
+        return [min(self.chunk_size, self.n_paths - i * self.chunk_size) for i in range(n_chunks)]
+
+    def _run_chunks(self, spec):
+        """
+        Exécute les blocs (par vagues d'un bloc par worker) et fusionne les queues.
+        """
+        sizes = self._chunk_sizes()
+        n_chunks = len(sizes)
+        tail = np.empty(0)
+        chunk_vars = []
+        n_simulated = 0
+
+        pool = ProcessPoolExecutor(self.n_workers) if self.n_workers > 1 else None
+        try:
+            for start in range(0, n_chunks, max(self.n_workers, 1)):
+                indices = range(start, min(start + max(self.n_workers, 1), n_chunks))
+                if pool is not None:
+                    futures = [pool.submit(_simulate_tail, spec, i, sizes[i]) for i in indices]
+                    outputs = [future.result() for future in futures]
+                else:
+                    outputs = [_simulate_tail(spec, i, sizes[i]) for i in indices]
+
+                for chunk_tail, chunk_var, size in outputs:
+                    merged = np.concatenate([tail, chunk_tail])
+                    keep = min(spec["tail_size"], len(merged))
+                    tail = np.partition(merged, keep - 1)[:keep]
+                    chunk_vars.append(chunk_var)
+                    n_simulated += size
+
+                if (
+                    self.target_standard_error is not None
+                    and len(chunk_vars) >= self.MIN_CHUNKS_FOR_STOP
+                    and self._standard_error(chunk_vars) <= self.target_standard_error
+                ):
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return np.sort(tail), n_simulated, self._standard_error(chunk_vars), len(chunk_vars)
+
+    @staticmethod
+    def _standard_error(chunk_vars):
+        if len(chunk_vars) < 2:
+            return math.inf
+        return float(np.std(chunk_vars, ddof=1) / math.sqrt(len(chunk_vars)))
+
+    def _calculate_var(self):
+        """
+        Calculate the VaR (and expected shortfall) by Monte Carlo simulation.
+        """
+        spec = self.simulation_spec()
+        tail, n_simulated, standard_error, _ = self._run_chunks(spec)
+
+        index = int((1 - self.confidence_level) * n_simulated)
+        var = -tail[index]
+        expected_shortfall = -np.mean(tail[:index]) if index > 0 else var
+
+        return {
+            "method": "Monte-Carlo",
+            "confidence_level": self.confidence_level,
+            "n_paths": n_simulated,
+            "standard_error": standard_error,
+            "expected_shortfall": expected_shortfall,
+            "var": var,
+        }
+
+    def _var_levels(self, levels):
+        """
+        VaR de chaque niveau lue dans une seule queue fusionnée et triée, conservée
+        assez longue pour le plus faible niveau demandé.
+        """
+        spec = self.simulation_spec(tail_confidence_level=float(np.min(levels)))
+        tail, n_simulated, _, _ = self._run_chunks(spec)
+        index = ((1 - levels) * n_simulated).astype(int)
+        return -tail[index]
+
+    @classmethod
+    def supports_rows(cls):
+        return False
+
+    def _var_rows(self, samples):
+        raise NotImplementedError(
+            "MonteCarloVaR simule à partir de l'ensemble de l'historique : le calcul par lignes "
+            "(rolling_var, evaluate_portfolios) n'est pas supporté."
+        )
+
+    def decompose(self):
+        """
+        VaR marginale, composante et incrémentale de chaque actif, par moyenne des
+        scénarios simulés conditionnelle au scénario de VaR.
+
+        Les blocs sont rejoués à l'identique (mêmes graines) pour sommer les scénarios
+        proches de la VaR sans les conserver en mémoire. La VaR incrémentale est
+        l'approximation au premier ordre (égale à la VaR composante).
+        """
+        spec = self.simulation_spec()
+        tail, n_simulated, _, n_chunks = self._run_chunks(spec)
+        index = int((1 - self.confidence_level) * n_simulated)
+        bandwidth = self._bandwidth()
+        lower = tail[max(index - bandwidth, 0)]
+        upper = tail[min(index + bandwidth, len(tail) - 1)]
+
+        sizes = self._chunk_sizes()[:n_chunks]
+        if self.n_workers > 1:
+            with ProcessPoolExecutor(self.n_workers) as pool:
+                futures = [
+                    pool.submit(_band_sums, spec, i, size, lower, upper) for i, size in enumerate(sizes)
+                ]
+                outputs = [future.result() for future in futures]
+        else:
+            outputs = [_band_sums(spec, i, size, lower, upper) for i, size in enumerate(sizes)]
+
+        totals = sum(total for total, _ in outputs)
+        count = sum(count for _, count in outputs)
+        marginal = -totals / count
+        weights = self._asset_weights()
+        return _decomposition_frame(weights, marginal, weights * marginal, -tail[index], self._asset_names())
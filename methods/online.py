@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# online.py
+
+import math
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import numpy as np
+
+
+class P2Quantile:
+    """
+    Estimateur de quantile en flux par l'algorithme P² (Jain & Chlamtac, 1985).
+
+    Seuls cinq marqueurs sont conservés : mémoire constante et mise à jour en O(1),
+    sans jamais trier l'historique.
+    """
+
+    def __init__(self, p):
+        """
+        :param p: Probabilité du quantile recherché (ex. 0.05).
+        """
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x):
+        self.count += 1
+        q = self._heights
+
+        # Initialisation sur les cinq premières observations
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Ajustement des marqueurs intermédiaires
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    @property
+    def value(self):
+        """
+        Estimation courante du quantile (exacte tant que moins de cinq observations).
+        """
+        if not self._heights:
+            return math.nan
+        if self.count <= 5:
+            heights = sorted(self._heights)
+            position = self.p * (len(heights) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(heights) - 1)
+            return heights[lower] + (position - lower) * (heights[upper] - heights[lower])
+        return self._heights[2]
+
+
+class SortedWindow:
+    """
+    Fenêtre glissante de rendements maintenue triée.
+
+    L'ajout d'un rendement (et le retrait du plus ancien lorsque la fenêtre est pleine)
+    se fait par recherche dichotomique dans le tampon trié : O(log n) comparaisons, et
+    toute statistique d'ordre (quantile empirique) est lue en O(1).
+
+    Avec `tail_size`, la somme des `tail_size` plus faibles rendements est tenue à jour
+    à chaque insertion et retrait (moyenne de la queue en O(1), pour la TVE).
+    """
+
+    def __init__(self, values=(), size=None, tail_size=0):
+        """
+        :param values: Rendements initiaux, dans l'ordre chronologique.
+        :param size: Taille maximale de la fenêtre (None : tout l'historique est conservé).
+        :param tail_size: Nombre de plus faibles rendements dont la somme est maintenue.
+        """
+        values = [float(value) for value in values]
+        if size is not None:
+            values = values[len(values) - size:] if len(values) > size else values
+        self.size = size
+        self.tail_size = tail_size
+        self._values = deque(values)
+        self._sorted = sorted(values)
+        self._tail_sum = math.fsum(self._sorted[:tail_size])
+        self._updates = 0
+
+    def append(self, x):
+        """
+        Ajoute un rendement ; retourne le rendement sorti de la fenêtre (ou None).
+        """
+        x = float(x)
+        self._values.append(x)
+        self._insert(x)
+        removed = None
+        if self.size is not None and len(self._values) > self.size:
+            removed = self._values.popleft()
+            self._remove(removed)
+
+        if self.tail_size:
+            # Resommer périodiquement la queue borne l'erreur d'arrondi accumulée
+            self._updates += 1
+            if self._updates >= max(len(self._sorted), 1000):
+                self._tail_sum = math.fsum(self._sorted[:self.tail_size])
+                self._updates = 0
+        return removed
+
+    def _insert(self, x):
+        position = bisect_right(self._sorted, x)
+        self._sorted.insert(position, x)
+        k = self.tail_size
+        if k:
+            if len(self._sorted) <= k:
+                self._tail_sum += x
+            elif position < k:
+                # x entre dans la queue, l'ancien k-ième plus faible rendement en sort
+                self._tail_sum += x - self._sorted[k]
+
+    def _remove(self, x):
+        position = bisect_left(self._sorted, x)
+        k = self.tail_size
+        if k:
+            if len(self._sorted) <= k:
+                self._tail_sum -= x
+            elif position < k:
+                # Le (k+1)-ième plus faible rendement entre dans la queue
+                self._tail_sum += self._sorted[k] - x
+        del self._sorted[position]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        """Statistique d'ordre : `window[i]` est le i-ème plus petit rendement."""
+        return self._sorted[index]
+
+    @property
+    def values(self):
+        """Rendements de la fenêtre dans l'ordre chronologique."""
+        return list(self._values)
+
+    def percentile(self, q):
+        """
+        Percentile (en %) par interpolation linéaire, comme np.percentile.
+        """
+        position = q / 100 * (len(self._sorted) - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, len(self._sorted) - 1)
+        low, high = self._sorted[lower], self._sorted[upper]
+        return low + (position - lower) * (high - low)
+
+    @property
+    def tail_mean(self):
+        """Moyenne des `tail_size` plus faibles rendements (NaN si la queue est vide)."""
+        count = min(self.tail_size, len(self._sorted))
+        return self._tail_sum / count if count else math.nan
+
+
+def rolling_order_statistics(values, window, rank, tail_size=0, step=1):
+    """
+    Statistique d'ordre et moyenne de la queue gauche de chaque fenêtre glissante.
+
+    Une seule fenêtre triée glisse sur la série : chaque pas insère et retire `step`
+    rendements en O(log window) comparaisons, au lieu de trier (ou partitionner) chaque
+    fenêtre.
+
+    :param values: Série 1D de rendements.
+    :param window: Taille des fenêtres.
+    :param rank: Rang (0 = plus faible) de la statistique d'ordre retournée.
+    :param tail_size: Nombre de plus faibles rendements moyennés (0 : pas de moyenne).
+    :param step: Pas (en observations) entre deux fenêtres successives.
+    :return: Tuple (statistiques d'ordre, moyennes de queue), une valeur par fenêtre,
+             dans l'ordre de `sliding_window_view(values, window)[::step]`.
+    """
+    values = np.asarray(values, dtype=float).tolist()
+    n_windows = (len(values) - window) // step + 1
+    k = tail_size
+
+    # Même tenue à jour que SortedWindow, en boucle locale (chemin critique)
+    buffer = sorted(values[:window])
+    tail_sum = math.fsum(buffer[:k])
+    order_statistics = [buffer[rank]]
+    tail_sums = [tail_sum]
+    for start in range(step, n_windows * step, step):
+        for outgoing, incoming in zip(values[start - step:start], values[start + window - step:start + window]):
+            position = bisect_right(buffer, incoming)
+            buffer.insert(position, incoming)
+            if position < k:
+                tail_sum += incoming - buffer[k]
+            position = bisect_left(buffer, outgoing)
+            if position < k:
+                tail_sum += buffer[k] - outgoing
+            del buffer[position]
+        if k and start % (window * step) < step:
+            # Resommer périodiquement la queue borne l'erreur d'arrondi accumulée
+            tail_sum = math.fsum(buffer[:k])
+        order_statistics.append(buffer[rank])
+        tail_sums.append(tail_sum)
+
+    tail_means = np.asarray(tail_sums) / k if k else None
+    return np.asarray(order_statistics), tail_means
+
+
+def cornish_fisher_z(z_score, skewness, kurtosis):
+    """
+    Quantile ajusté de Cornish-Fisher (asymétrie et kurtosis en excès), partagé par
+    CornishFisherVaR et OnlineVaR ; accepte des scalaires ou des tableaux.
+    """
+    return (
+        z_score
+        + (1 / 6) * (z_score**2 - 1) * skewness
+        + (1 / 24) * (z_score**3 - 3 * z_score) * kurtosis
+        - (1 / 36) * (2 * z_score**3 - 5 * z_score) * (skewness**2)
+    )
+
+
+class RunningMoments:
+    """
+    Moyenne, écart-type, asymétrie et kurtosis en flux (formules de Welford / Pébay).
+
+    Les estimateurs retournés sont les mêmes que ceux de pandas (ddof=1, asymétrie et
+    kurtosis en excès non biaisées).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._m3 = 0.0
+        self._m4 = 0.0
+
+    def update(self, x):
+        n1 = self.count
+        self.count += 1
+        n = self.count
+        delta = x - self.mean
+        delta_n = delta / n
+        delta_n2 = delta_n * delta_n
+        term1 = delta * delta_n * n1
+
+        self.mean += delta_n
+        self._m4 += (
+            term1 * delta_n2 * (n * n - 3 * n + 3) + 6 * delta_n2 * self._m2 - 4 * delta_n * self._m3
+        )
+        self._m3 += term1 * delta_n * (n - 2) - 3 * delta_n * self._m2
+        self._m2 += term1
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    @property
+    def skew(self):
+        n = self.count
+        if n < 3 or self._m2 == 0:
+            return math.nan
+        g1 = math.sqrt(n) * self._m3 / self._m2 ** 1.5
+        return math.sqrt(n * (n - 1)) / (n - 2) * g1
+
+    @property
+    def kurtosis(self):
+        n = self.count
+        if n < 4 or self._m2 == 0:
+            return math.nan
+        g2 = n * self._m4 / self._m2 ** 2 - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+
+class EWMAVariance:
+    """
+    Variance EWMA (RiskMetrics) mise à jour en O(1), initialisée au premier rendement au carré.
+    """
+
+    def __init__(self, lambda_factor=0.94):
+        self.lambda_factor = lambda_factor
+        self.variance = None
+
+    def update(self, x):
+        if self.variance is None:
+            self.variance = x * x
+        else:
+            self.variance = self.lambda_factor * self.variance + (1 - self.lambda_factor) * x * x
+
+    @property
+    def volatility(self):
+        return math.nan if self.variance is None else math.sqrt(self.variance)
+
+
+class TailMeanEstimator:
+    """
+    Moyenne courante de la queue gauche, pour la TVE en flux.
+
+    Chaque rendement inférieur ou égal à l'estimation P² courante du quantile est
+    ajouté à une somme et un compteur : mémoire constante, au prix d'une approximation
+    tant que l'estimation du quantile n'est pas stabilisée.
+    """
+
+    def __init__(self, quantile):
+        """
+        :param quantile: Estimateur P2Quantile partagé donnant le seuil de la queue.
+        """
+        self.quantile = quantile
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, x):
+        # Appelé après la mise à jour du quantile
+        if x <= self.quantile.value:
+            self.total += x
+            self.count += 1
+
+    @property
+    def value(self):
+        return self.total / self.count if self.count else math.nan
+
+
+class OnlineVaR:
+    """
+    VaR en flux : chaque appel à `update(return_)` met à jour en O(1) et en mémoire
+    constante l'ensemble des méthodes sélectionnées.
+    """
+
+    METHODS = ("Historical", "Variance-Covariance", "Cornish-Fisher", "Risk-Metrics", "TVE")
+
+    def __init__(self, confidence_level=0.95, methods=METHODS, lambda_factor=0.94):
+        """
+        :param confidence_level: Niveau de confiance pour la VaR.
+        :param methods: Méthodes à maintenir (noms de METHODS).
+        :param lambda_factor: Facteur de décroissance EWMA pour Risk-Metrics.
+        """
+        unknown = set(methods) - set(self.METHODS)
+        if unknown:
+            raise ValueError(f"Méthodes non supportées en flux : {sorted(unknown)}")
+
+        self.confidence_level = confidence_level
+        self.methods = tuple(methods)
+        self.count = 0
+        self.quantile = P2Quantile(1 - confidence_level)
+        self.moments = RunningMoments() if {"Variance-Covariance", "Cornish-Fisher"} & set(methods) else None
+        self.ewma = EWMAVariance(lambda_factor) if "Risk-Metrics" in methods else None
+        self.tail = TailMeanEstimator(self.quantile) if "TVE" in methods else None
+
+    @classmethod
+    def from_history(cls, returns, **kwargs):
+        """
+        Initialise les estimateurs sur un historique de rendements du portefeuille.
+        """
+        online = cls(**kwargs)
+        for return_ in returns:
+            online.update(return_)
+        return online
+
+    def update(self, return_):
+        """
+        Intègre un nouveau rendement du portefeuille dans tous les estimateurs.
+        """
+        return_ = float(return_)
+        self.count += 1
+        self.quantile.update(return_)
+        if self.moments is not None:
+            self.moments.update(return_)
+        if self.ewma is not None:
+            self.ewma.update(return_)
+        if self.tail is not None:
+            self.tail.update(return_)
+
+    def calculate_var(self):
+        """
+        VaR courante de chaque méthode sélectionnée, avec les mêmes formules que les
+        méthodes en lot.
+
+        :return: Dictionnaire {méthode: VaR}.
+        """
+        quantile = self.quantile.value
+        z_score = abs(quantile)
+        results = {}
+
+        if "Historical" in self.methods:
+            results["Historical"] = -quantile
+        if "Variance-Covariance" in self.methods:
+            results["Variance-Covariance"] = z_score * self.moments.std - self.moments.mean
+        if "Cornish-Fisher" in self.methods:
+            skewness, kurtosis = self.moments.skew, self.moments.kurtosis
+            adjusted_z = cornish_fisher_z(z_score, skewness, kurtosis)
+            results["Cornish-Fisher"] = adjusted_z * self.moments.std - self.moments.mean
+        if "Risk-Metrics" in self.methods:
+            results["Risk-Metrics"] = z_score * self.ewma.volatility
+        if "TVE" in self.methods:
+            results["TVE"] = -self.tail.value
+
+        return results
@@ -1,15 +1,33 @@
-from methods import *
-from backtesting.backtesting import Backtesting
+import logging
+
+from backtesting.engine import BacktestEngine, rolling_forecasts
+from .base_method import BaseVaRMethod
+from .portfolio_returns import PortfolioReturns
+from .historical_var import HistoricalVaR
+from .parametric_var import ParametricVaR
+from .cornish_fisher_var import CornishFisherVaR
+from .risk_metrics_var import RiskMetricsVaR
+from .garch_var import GARCHVaR
+from .tve_var import TVEVar
+from .tve_garch_var import TVEGarchVaR
+
+logger = logging.getLogger(__name__)
 
 class OptimalVaR(BaseVaRMethod):
-    def __init__(self, portfolio_returns, confidence_level):
+    def __init__(self, portfolio_returns, confidence_level, window=250):
         """
         Initialize the OptimalVaR class.
 
-        :param portfolio_returns: The returns data to evaluate.
+        :param portfolio_returns: The returns data to evaluate (raw data or a shared PortfolioReturns).
         :param confidence_level: The confidence level for VaR calculation.
+        :param window: Estimation window of the rolling forecasts used to backtest the candidates
+                       (capped at half the sample, see `backtesting.engine.backtest_window`).
         """
+        # Preprocess the returns once and share them with every candidate method
+        if not isinstance(portfolio_returns, PortfolioReturns):
+            portfolio_returns = PortfolioReturns(portfolio_returns)
         super().__init__(portfolio_returns, confidence_level)
+        self.window = window
         self.var_methods = {
             "Historical": HistoricalVaR(portfolio_returns, confidence_level),
             "Variance-Covariance": ParametricVaR(portfolio_returns, confidence_level),
@@ -20,51 +38,61 @@ class OptimalVaR(BaseVaRMethod):
             "TVE-GARCH": TVEGarchVaR(portfolio_returns, confidence_level),
         }
 
-    def calculate_var(self):
-        """
-        Iterate through all VaR methods, perform backtesting, and determine the optimal method.
+    def _calculate_var(self):
         """
-        optimal_method = None
-        optimal_result = None
-        optimal_score = float('inf')
+        Backtest every candidate method on its rolling VaR forecasts and keep the one whose
+        violations best pass the conditional coverage test (highest p-value).
 
-        # Dictionary to store VaR results for all methods
-        var_results = {}
+        Samples too short to be backtested fall back to the Historical VaR, with no score.
+        """
+        try:
+            engine, errors = self.backtest()
+        except ValueError as error:
+            logger.warning("Cannot backtest the candidate methods (%s), falling back to Historical VaR", error)
+            return {
+                "method": "Historical",
+                "confidence_level": self.confidence_level,
+                "optimal_score": None,
+                "var": self.var_methods["Historical"].calculate_var()["var"],
+            }
+        for method_name, error in errors.items():
+            logger.warning("Skipping %s: no rolling forecasts (%s)", method_name, error)
 
-        for method_name, method_instance in self.var_methods.items():
-            # Ensure we store only numeric values, not dictionaries
-            var_result = method_instance.calculate_var()
+        p_values = engine.run()["conditional_coverage_p_value"].droplevel("confidence_level")
+        for method_name, p_value in p_values.sort_values(ascending=False, kind="stable").items():
+            var_result = self.var_methods[method_name].calculate_var()
 
             # Ensure `var_result` is a numeric value or array-like, NOT a dictionary
             if isinstance(var_result, dict):
-                print(f"Warning: Unexpected dictionary format in {method_name}, extracting 'var' key")
+                logger.debug("Unexpected dictionary format in %s, extracting 'var' key", method_name)
                 var_result = var_result.get("var", None)  # Extract numeric VaR if present
 
             if var_result is None:
-                print(f"Skipping {method_name} due to missing VaR result")
+                logger.warning("Skipping %s due to missing VaR result", method_name)
                 continue
 
-            var_results[method_name] = var_result  # Store only numeric values
-
-        # Perform backtesting for all methods
-        backtesting = Backtesting(self.portfolio_returns, var_results)
-        backtesting_results = backtesting.perform_tests(var_results)
-
-        for method_name, var_result in var_results.items():
-            # Extract exceptions from backtesting results
-            exceptions = backtesting_results.get(method_name, 0)  # Default to 0 if missing
-            error_rate = exceptions / len(self.portfolio_returns)  # Calculate error rate
-
-            # Update optimal method if current method has a lower error rate
-            if error_rate < optimal_score:
-                optimal_score = error_rate
-                optimal_method = method_name
-                optimal_result = var_result
+            return {
+                "method": method_name,
+                "confidence_level": self.confidence_level,
+                "optimal_score": p_value,
+                "var": var_result,
+            }
 
         return {
-            "method": optimal_method,
+            "method": None,
             "confidence_level": self.confidence_level,
-            "optimal_score": optimal_score,
-            "var": optimal_result,
+            "optimal_score": None,
+            "var": None,
         }
 
+    def backtest(self):
+        """
+        Backtest the candidate methods on their rolling forecasts over `window` observations
+        (GARCH-based candidates are fitted once, see `GARCHVaR.backtest_forecasts`).
+
+        :return: Tuple (BacktestEngine, {method: error}) for the methods without forecasts.
+        """
+        returns, forecasts, errors = rolling_forecasts(self.var_methods, self.window)
+        if not forecasts:
+            raise ValueError("No candidate method provides rolling VaR forecasts.")
+        return BacktestEngine.from_forecasts(returns, forecasts), errors
@@ -1,20 +1,20 @@
-import numpy as np
 from .base_method import BaseVaRMethod
+from .decomposition import parametric_decomposition
 
 class ParametricVaR(BaseVaRMethod):
     """
     Implementation of Variance-Covariance VaR method.
     """
 
-    def calculate_var(self):
+    def _calculate_var(self):
         """
         Calculate the VaR using the Variance-Covariance approach.
         """
         self.validate_inputs()
 
-        mean = self.portfolio_returns.mean()
-        std_dev = self.portfolio_returns.std()
-        z_score = np.abs(np.percentile(self.portfolio_returns, (1 - self.confidence_level) * 100))
+        mean = self.returns_data.mean
+        std_dev = self.returns_data.std
+        z_score = self._z_score()
 
         var = z_score * std_dev - mean
 
@@ -26,3 +26,23 @@ class ParametricVaR(BaseVaRMethod):
             "z_score": z_score,
             "var": var,
         }
+
+    def _var_levels(self, levels):
+        return self._levels_z_scores(levels) * self.returns_data.std - self.returns_data.mean
+
+    def _var_rows(self, samples):
+        """
+        VaR paramétrique de chaque ligne à partir de ses moments.
+        """
+        mean = samples.mean(axis=1)
+        std_dev = samples.std(axis=1, ddof=1)
+        return self._row_z_scores(samples) * std_dev - mean
+
+    def decompose(self):
+        """
+        VaR marginale, composante et incrémentale de chaque actif (gradients analytiques).
+        """
+        self.validate_inputs()
+        return parametric_decomposition(
+            self.returns_data.asset_returns, self._asset_weights(), self._z_score(), self._asset_names()
+        )
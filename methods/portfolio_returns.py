@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# portfolio_returns.py
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from data.returns_store import ReturnsStore
+
+
+class PortfolioReturns:
+    """
+    Rendements de portefeuille partagés, en lecture seule, entre les méthodes de VaR.
+
+    La conversion des données et la pondération des actifs sont faites une seule fois à
+    la construction. Les statistiques (rendements triés, moments, quantiles) sont
+    calculées à la première demande puis mises en cache.
+    """
+
+    def __init__(self, returns, weights=None):
+        """
+        :param returns: Rendements des actifs (1D ou 2D : ndarray, Series, DataFrame ou
+                        ReturnsStore, lu sans copie).
+        :param weights: Poids des actifs dans le portefeuille (par défaut égalité entre les actifs).
+        """
+        if returns is None:
+            raise ValueError("Portfolio returns data is None. Please provide valid data.")
+
+        index = getattr(returns, "index", None)
+        columns = getattr(returns, "columns", None)
+        # Pas de copie pour des données déjà flottantes (float32 conservé)
+        values = np.asarray(returns)
+        if not np.issubdtype(values.dtype, np.floating):
+            values = values.astype(float)
+
+        if values.size == 0:
+            raise ValueError("Portfolio returns data is empty.")
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        elif values.ndim != 2:
+            raise ValueError("Invalid data format. Portfolio returns must be 1D or 2D.")
+
+        num_columns = values.shape[1]
+        if num_columns > 1:
+            if weights is None:
+                # Poids égaux si non spécifiés
+                weights = np.ones(num_columns) / num_columns
+            elif len(weights) != num_columns:
+                raise ValueError("Le nombre de poids ne correspond pas au nombre de colonnes.")
+            weights = np.asarray(weights, dtype=float)
+            portfolio = values @ weights
+        else:
+            portfolio = values[:, 0].copy()
+
+        if values.flags.writeable:
+            values = values.view()
+            values.flags.writeable = False
+        portfolio.flags.writeable = False
+
+        # Magasin mappé en mémoire, rouvert par les processus workers au lieu d'être copié
+        self.store = returns if isinstance(returns, ReturnsStore) else None
+        self.index = index
+        self.columns = columns
+        self.asset_returns = values
+        self.weights = weights
+        self.values = portfolio
+        self._percentiles = {}
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("PortfolioReturns est immuable.")
+        super().__setattr__(name, value)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.store is not None:
+            del state["asset_returns"]
+        return state
+
+    def __setstate__(self, state):
+        if state.get("store") is not None:
+            state["asset_returns"] = np.asarray(state["store"])
+        self.__dict__.update(state)
+
+    def __len__(self):
+        return len(self.values)
+
+    @cached_property
+    def series(self):
+        """Rendements du portefeuille sous forme de pd.Series."""
+        return pd.Series(self.values)
+
+    @cached_property
+    def sorted(self):
+        """Rendements du portefeuille triés par ordre croissant."""
+        sorted_returns = np.sort(self.values)
+        sorted_returns.flags.writeable = False
+        return sorted_returns
+
+    @cached_property
+    def mean(self):
+        return float(self.values.mean())
+
+    @cached_property
+    def std(self):
+        """Écart-type échantillon (ddof=1), comme pandas."""
+        return float(self.values.std(ddof=1))
+
+    @cached_property
+    def skew(self):
+        """Asymétrie échantillon non biaisée, comme pandas."""
+        from scipy import stats
+
+        return float(stats.skew(self.values, bias=False))
+
+    @cached_property
+    def kurtosis(self):
+        """Kurtosis en excès non biaisée, comme pandas."""
+        from scipy import stats
+
+        return float(stats.kurtosis(self.values, bias=False))
+
+    def percentile(self, q):
+        """
+        Percentile (en %) des rendements du portefeuille, mis en cache par valeur de q.
+        """
+        if q not in self._percentiles:
+            self._percentiles[q] = float(np.percentile(self.sorted, q))
+        return self._percentiles[q]
+
+    def tail(self, confidence_level):
+        """
+        Rendements de la queue gauche au niveau de confiance donné (vue sur `sorted`).
+        """
+        return self.sorted[:int((1 - confidence_level) * len(self.sorted))]
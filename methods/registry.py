@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# registry.py
+
+from collections.abc import Mapping
+from importlib import import_module
+
+# Nom affiché -> (module, classe). Les modules ne sont importés qu'à la première demande :
+# une exécution « Historical » seule n'importe ni arch ni scipy.stats.
+METHODS = {
+    "Historical": ("methods.historical_var", "HistoricalVaR"),
+    "Variance-Covariance": ("methods.parametric_var", "ParametricVaR"),
+    "Cornish-Fisher": ("methods.cornish_fisher_var", "CornishFisherVaR"),
+    "Risk-Metrics": ("methods.risk_metrics_var", "RiskMetricsVaR"),
+    "GARCH": ("methods.garch_var", "GARCHVaR"),
+    "TVE": ("methods.tve_var", "TVEVar"),
+    "TVE-GARCH": ("methods.tve_garch_var", "TVEGarchVaR"),
+    "Monte-Carlo": ("methods.monte_carlo_var", "MonteCarloVaR"),
+    "Optimal-VaR": ("methods.optimal_var", "OptimalVaR"),
+}
+
+
+class MethodRegistry(Mapping):
+    """
+    Correspondance nom de méthode -> classe de VaR, chargée à la demande.
+
+    Parcourir les noms (`in`, `keys()`, `len`) n'importe rien ; seul l'accès à une
+    classe importe son module, une seule fois.
+    """
+
+    def __init__(self, methods=METHODS):
+        self._methods = dict(methods)
+        self._classes = {}
+
+    def __getitem__(self, name):
+        if name not in self._classes:
+            module_name, class_name = self._methods[name]
+            self._classes[name] = getattr(import_module(module_name), class_name)
+        return self._classes[name]
+
+    def __iter__(self):
+        return iter(self._methods)
+
+    def __len__(self):
+        return len(self._methods)
+
+
+method_registry = MethodRegistry()
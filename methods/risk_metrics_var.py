@@ -1,6 +1,35 @@
+import logging
+
 import numpy as np
-import pandas as pd
+from scipy.signal import lfilter
 from .base_method import BaseVaRMethod
+from .decomposition import ewma_decomposition
+
+logger = logging.getLogger(__name__)
+
+
+def ewma_volatility(returns, lambda_factor=0.94):
+    """
+    Calcule la trajectoire complète de la volatilité EWMA (RiskMetrics).
+
+    La récursion sigma²_t = lambda * sigma²_{t-1} + (1 - lambda) * r²_t, initialisée
+    à sigma²_0 = r²_0, est appliquée comme un filtre linéaire sur l'axe du temps :
+    une matrice de rendements (une colonne par actif) est traitée en un seul appel.
+
+    :param returns: Rendements 1D (T,) ou 2D (T, n_actifs).
+    :param lambda_factor: Facteur de décroissance, ou liste de facteurs.
+    :return: np.ndarray de même forme que `returns` ; si une liste de facteurs est
+             fournie, un premier axe supplémentaire indexe les facteurs.
+    """
+    squared = np.square(np.asarray(returns, dtype=float))
+    lambdas = np.atleast_1d(np.asarray(lambda_factor, dtype=float))
+
+    variance = np.empty((len(lambdas),) + squared.shape)
+    for i, lam in enumerate(lambdas):
+        variance[i], _ = lfilter([1 - lam], [1, -lam], squared, axis=0, zi=lam * squared[:1])
+
+    volatility = np.sqrt(variance)
+    return volatility if np.ndim(lambda_factor) else volatility[0]
 
 
 class RiskMetricsVaR(BaseVaRMethod):
@@ -21,38 +50,57 @@ class RiskMetricsVaR(BaseVaRMethod):
         self.ewma_volatility = None
 
 
-    def calculate_var(self):
+    def _calculate_var(self):
+        """
+        Calculate the VaR using the RiskMetrics (EWMA) approach.
+        """
         self.validate_inputs()
 
-        returns_squared = self.portfolio_returns ** 2
-        ewma_volatility = np.zeros(len(returns_squared))
-        ewma_volatility[0] = returns_squared.iloc[0]
-
-        for t in range(1, len(returns_squared)):
-            ewma_volatility[t] = (
-                    self.lambda_factor * ewma_volatility[t - 1]
-                    + (1 - self.lambda_factor) * returns_squared.iloc[t]
-            )
-
-        self.ewma_volatility = np.sqrt(ewma_volatility)
-        z_score = np.abs(np.percentile(self.portfolio_returns, (1 - self.confidence_level) * 100))
+        self.ewma_volatility = ewma_volatility(self.returns_data.values, self.lambda_factor)
+        z_score = self._z_score()
         var = z_score * self.ewma_volatility[-1]
 
         result = {
             "method": "RiskMetrics",
             "confidence_level": self.confidence_level,
             "ewma_volatility": self.ewma_volatility[-1],
+            "ewma_volatility_path": self.ewma_volatility,
             "z_score": z_score,
             "var": var,
         }
 
-        # 🔍 Debugging prints
-        print("==== RiskMetrics VaR Calculation ====")
-        print(f"Portfolio Returns: {self.portfolio_returns[:5]}")  # First 5 returns
-        print(f"EWMA Volatility: {self.ewma_volatility[-5:]}")  # Last 5 volatility values
-        print(f"Z-Score: {z_score}")
-        print(f"Computed VaR: {var}")
-        print(f"Returned Result: {result}")
+        logger.debug(
+            "RiskMetrics VaR computed",
+            extra={"ewma_volatility": float(self.ewma_volatility[-1]), "z_score": float(z_score), "var": float(var)},
+        )
 
         return result
 
+    def _var_levels(self, levels):
+        self.ewma_volatility = ewma_volatility(self.returns_data.values, self.lambda_factor)
+        return self._levels_z_scores(levels) * self.ewma_volatility[-1]
+
+    def _var_rows(self, samples):
+        """
+        VaR RiskMetrics de chaque ligne.
+
+        La récursion EWMA initialisée au début de chaque ligne se réduit à une
+        moyenne pondérée des rendements au carré, calculée par un seul produit matriciel.
+        """
+        size = samples.shape[1]
+        decay = self.lambda_factor ** np.arange(size - 1, -1, -1)
+        weights = (1 - self.lambda_factor) * decay
+        weights[0] = decay[0]
+
+        ewma_volatility = np.sqrt((samples ** 2) @ weights)
+        return self._row_z_scores(samples) * ewma_volatility
+
+    def decompose(self):
+        """
+        VaR marginale, composante et incrémentale de chaque actif (covariance EWMA).
+        """
+        self.validate_inputs()
+        return ewma_decomposition(
+            self.returns_data.asset_returns, self._asset_weights(), self._z_score(),
+            self.lambda_factor, self._asset_names(),
+        )
@@ -6,20 +6,18 @@ class TVEGarchVaR(GARCHVaR):
     Implementation of TVE-GARCH (Tail Value at Risk with GARCH) method.
     """
 
-    def calculate_var(self):
+    def _calculate_var(self):
         """
         Calculate the TVE using a GARCH(1,1) model for volatility estimation.
         """
         self.validate_inputs()
 
         # Use the GARCH model to forecast conditional volatility
-        garch_result = super().calculate_var()
+        garch_result = super()._calculate_var()
         conditional_volatility = garch_result["conditional_volatility"]
 
-        # Sort returns to identify the tail losses
-        sorted_returns = np.sort(self.portfolio_returns)
-        index = int((1 - self.confidence_level) * len(sorted_returns))
-        tail_losses = sorted_returns[:index]
+        # Left tail of the (shared) sorted returns
+        tail_losses = self.returns_data.tail(self.confidence_level)
 
         # Calculate TVE as the average of the tail losses scaled by conditional volatility
         tve_garch = -np.mean(tail_losses) * conditional_volatility
@@ -31,3 +29,11 @@ class TVEGarchVaR(GARCHVaR):
             "tve_garch": tve_garch,
             "tail_losses": tail_losses.tolist(),
         }
+
+    def _var_levels(self, levels):
+        return -self._levels_tail_means(levels) * self._conditional_volatility()
+
+    def _rows_scale(self, samples):
+        index = int((1 - self.confidence_level) * samples.shape[1])
+        tail_losses = np.partition(samples, index, axis=1)[:, :index]
+        return -tail_losses.mean(axis=1)
@@ -1,21 +1,20 @@
 import numpy as np
 from .base_method import BaseVaRMethod
+from .online import rolling_order_statistics
 
 class TVEVar(BaseVaRMethod):
     """
     Implementation of TVE (Tail Value at Risk) method.
     """
 
-    def calculate_var(self):
+    def _calculate_var(self):
         """
         Calculate the Tail Value at Risk (TVE).
         """
         self.validate_inputs()
 
-        # Sort returns to identify the tail losses
-        sorted_returns = np.sort(self.portfolio_returns)
-        index = int((1 - self.confidence_level) * len(sorted_returns))
-        tail_losses = sorted_returns[:index]
+        # Left tail of the (shared) sorted returns
+        tail_losses = self.returns_data.tail(self.confidence_level)
 
         # Calculate TVE as the average of the tail losses
         tve = -np.mean(tail_losses)  # Typically positive
@@ -26,3 +25,20 @@ class TVEVar(BaseVaRMethod):
             "tve": tve,
             "tail_losses": tail_losses.tolist(),
         }
+
+    def _var_levels(self, levels):
+        return -self._levels_tail_means(levels)
+
+    def _var_rows(self, samples):
+        """
+        TVE de chaque ligne : moyenne des `index` plus faibles rendements, tenue à jour
+        sur une fenêtre triée glissante pour les fenêtres de `rolling_var`.
+        """
+        index = int((1 - self.confidence_level) * samples.shape[1])
+        sliding = self._sliding_source(samples) if index > 0 else None
+        if sliding is not None:
+            series, step = sliding
+            _, tail_means = rolling_order_statistics(series, samples.shape[1], index, index, step)
+            return -tail_means
+        tail_losses = np.partition(samples, index, axis=1)[:, :index]
+        return -tail_losses.mean(axis=1)
@@ -0,0 +1,204 @@
+"""
+Per-stage and per-method timing, CPU, peak-memory and profiling records for a run.
+
+    instrumentation = Instrumentation(trace_memory=True, profile=True)
+    with instrumentation.stage("fetch_data"):
+        ...
+    instrumentation.write_report("run_timing.json")
+"""
+
+import cProfile
+import datetime
+import functools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class Instrumentation:
+    """
+    Records wall time, CPU time and (optionally) peak traced memory of named stages.
+
+    Peak memory is measured with tracemalloc, which NumPy allocations report to. The
+    tracemalloc peak is process-wide: before each reset, the current peak is folded
+    into every open record, so a record holds the peak over its own interval even when
+    stages are nested or methods run concurrently in threads (concurrent methods then
+    share the peaks they overlap with).
+    """
+
+    def __init__(self, trace_memory=False, profile=False):
+        """
+        :param trace_memory: Record peak memory per stage (tracemalloc slows allocations down).
+        :param profile: Capture a cProfile profile of the outermost stages (calling thread only).
+        """
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile() if profile else None
+        self.run_id = uuid.uuid4().hex
+        self.started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.records = []
+        self._open = {}
+        self._lock = threading.Lock()
+        self._profile_depth = 0
+        self._started_tracing = False
+
+    def _fold_peak(self):
+        """
+        Report the current tracemalloc peak to every open record, then reset it.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self._open.values():
+            record["peak_memory_bytes"] = max(record["peak_memory_bytes"], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name, cpu_clock=time.process_time, **labels):
+        """
+        Measure the enclosed block and append its record.
+
+        :param name: Stage name (e.g. "calculate_var").
+        :param cpu_clock: CPU clock; `time.thread_time` for work running in a worker thread.
+        :param labels: Extra fields stored with the record (e.g. method="GARCH").
+        """
+        record = {"stage": name, **labels, "status": "ok"}
+        key = object()
+
+        if self.trace_memory:
+            with self._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracing = True
+                self._fold_peak()
+                record["start_memory_bytes"] = record["peak_memory_bytes"] = tracemalloc.get_traced_memory()[0]
+                self._open[key] = record
+
+        profiling = self.profiler is not None and threading.current_thread() is threading.main_thread()
+        if profiling:
+            if self._profile_depth == 0:
+                self.profiler.enable()
+            self._profile_depth += 1
+
+        wall_started, cpu_started = time.perf_counter(), cpu_clock()
+        try:
+            yield record
+        except BaseException as error:
+            record["status"] = "failed"
+            record["error"] = repr(error)
+            raise
+        finally:
+            record["wall_seconds"] = time.perf_counter() - wall_started
+            record["cpu_seconds"] = cpu_clock() - cpu_started
+
+            if profiling:
+                self._profile_depth -= 1
+                if self._profile_depth == 0:
+                    self.profiler.disable()
+
+            if self.trace_memory:
+                with self._lock:
+                    self._fold_peak()
+                    del self._open[key]
+
+            self._append(record)
+
+    def _append(self, record):
+        with self._lock:
+            self.records.append(record)
+        logger.info("%s finished in %.3f s", record.get("method", record["stage"]), record["wall_seconds"],
+                    extra={"run_id": self.run_id, **record})
+
+    def add_record(self, name, wall_seconds, cpu_seconds, peak_memory_bytes=None, **labels):
+        """
+        Append a record measured elsewhere (e.g. inside a worker process).
+        """
+        record = {"stage": name, "status": "ok", **labels,
+                  "wall_seconds": wall_seconds, "cpu_seconds": cpu_seconds}
+        if peak_memory_bytes is not None:
+            record["peak_memory_bytes"] = peak_memory_bytes
+        self._append(record)
+
+    def stop(self):
+        """
+        Stop tracemalloc if this instance started it.
+        """
+        if self._started_tracing and not self._open:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def top_functions(self, limit=20):
+        """
+        Functions with the largest cumulative time in the captured profile.
+        """
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "total_seconds": total,
+                "cumulative_seconds": cumulative,
+            }
+            for (filename, line, function), (_, calls, total, cumulative, _) in rows
+        ]
+
+    def report(self):
+        """
+        Run report: one entry per stage record, plus profile hot spots when profiling.
+        """
+        with self._lock:
+            records = list(self.records)
+        report = {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "pid": os.getpid(),
+            "trace_memory": self.trace_memory,
+            "records": records,
+        }
+        if self.profiler is not None:
+            report["profile"] = self.top_functions()
+        return report
+
+    def write_report(self, path):
+        """
+        Write the JSON report; with profiling, also dump the raw profile next to it (.prof).
+        """
+        report = self.report()
+        if self.profiler is not None:
+            profile_path = os.path.splitext(path)[0] + ".prof"
+            self.profiler.dump_stats(profile_path)
+            report["profile_file"] = profile_path
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, default=str)
+        return path
+
+
+def instrumented_stage(name):
+    """
+    Decorator running a method inside `self.instrumentation.stage(name)`.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def measured(function, *args, **kwargs):
+    """
+    Call `function` and return (result, wall seconds, CPU seconds of the calling thread).
+    Usable inside worker processes, where the parent's Instrumentation is not reachable.
+    """
+    wall_started, cpu_started = time.perf_counter(), time.thread_time()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - wall_started, time.thread_time() - cpu_started
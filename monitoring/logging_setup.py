@@ -0,0 +1,45 @@
+"""
+Logging configuration: leveled, optionally structured (one JSON object per line).
+
+Library modules only create loggers (`logging.getLogger(__name__)`) and pass
+structured fields through `extra=`; entry points call `configure_logging`.
+"""
+
+import json
+import logging
+
+# Attributes of every LogRecord; anything else was passed through `extra=`
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format each record as a JSON object, including the fields passed through `extra=`.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level="INFO", structured=False):
+    """
+    Configure the root logger once for an entry point.
+
+    :param level: Minimum level ("DEBUG" shows the former debugging output).
+    :param structured: Emit JSON lines instead of human-readable text.
+    """
+    handler = logging.StreamHandler()
+    if structured:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
@@ -1,13 +1,66 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+import io
+import logging
+import os
 import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+# Excel sheet limits
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_COLUMNS = 16_384
+
+
+def reserve_report_path(output_dir=".", stem=None, extension=".xlsx"):
+    """
+    Reserve a collision-free report path: `<stem>.xlsx`, then `<stem>_1.xlsx`, ...
+
+    The file is created atomically (O_EXCL), so concurrent runs and worker processes
+    writing to the same directory never pick the same name.
+
+    :param output_dir: Directory of the report (created if needed).
+    :param stem: File name without extension (default: VaR_Report_<date>).
+    :return: Path of the reserved (empty) file, to be overwritten by the report.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stem = stem or f"VaR_Report_{datetime.date.today()}"
+    suffix = 0
+    while True:
+        name = f"{stem}{'_' + str(suffix) if suffix else ''}{extension}"
+        path = os.path.join(output_dir, name)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            suffix += 1
+
 
 class ReportGenerator:
-    def __init__(self, assets, start_date, end_date, confidence_level, selected_methods, var_results, returns):
+    def __init__(self, assets, start_date, end_date, confidence_level, selected_methods, var_results, returns,
+                 report_filename=None, max_excel_cells=1_000_000, sidecar_format="parquet", chunk_size=10_000,
+                 max_plotted_assets=20, output_dir="."):
         """
         Initialize report generator.
+
+        :param report_filename: Workbook path (default: a collision-free VaR_Report_<date>.xlsx
+                                in `output_dir`, reserved when the report is generated).
+        :param max_excel_cells: Above this many return values, the daily returns are written
+                                to a sidecar file instead of the workbook.
+        :param sidecar_format: "parquet" or "csv".
+        :param chunk_size: Number of return rows converted and streamed at a time.
+        :param max_plotted_assets: Above this many assets, the plot shows the equal-weight
+                                   average return instead of one line per asset.
+        :param output_dir: Directory of the default report path.
         """
+        if sidecar_format not in ("parquet", "csv"):
+            raise ValueError(f"Unknown sidecar format: {sidecar_format}. Choose 'parquet' or 'csv'.")
+
         self.assets = assets
         self.start_date = start_date
         self.end_date = end_date
@@ -15,54 +68,132 @@ class ReportGenerator:
         self.selected_methods = selected_methods
         self.var_results = var_results
         self.returns = returns  # Store the daily returns for plotting
-        self.report_filename = f"VaR_Report_{datetime.date.today()}.xlsx"
+        self.report_filename = report_filename
+        self.output_dir = output_dir
+        self.max_excel_cells = max_excel_cells
+        self.sidecar_format = sidecar_format
+        self.chunk_size = chunk_size
+        self.max_plotted_assets = max_plotted_assets
+
+    def _clean_var_results(self):
+        """VaR value of each method, whether results are numbers or result dictionaries."""
+        return {
+            method: (values if isinstance(values, (float, int, np.floating)) else values.get("var"))
+            for method, values in self.var_results.items()
+        }
 
     def generate_report(self):
-        """Generates an Excel report with VaR results and a plot."""
-        with pd.ExcelWriter(self.report_filename, engine='xlsxwriter') as writer:
-            # Create Summary DataFrame
-            summary_data = {
-                "Parameter": ["Assets", "Start Date", "End Date", "Confidence Level", "Selected Methods"],
-                "Value": [
-                    ", ".join(self.assets),
-                    self.start_date,
-                    self.end_date,
-                    f"{self.confidence_level * 100}%",
-                    ", ".join(self.selected_methods),
-                ],
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name="Summary", index=False)
-
-            # Ensure VaR results are in the correct format
-            clean_var_results = {
-                method: (values if isinstance(values, (float, int)) else values.get("var"))
-                for method, values in self.var_results.items()
-            }
-            var_df = pd.DataFrame(clean_var_results, index=["VaR"]).T
-            var_df.to_excel(writer, sheet_name="VaR Results")
-
-            # Save returns data
-            self.returns.to_excel(writer, sheet_name="Daily Returns")
-
-            # Generate and insert the plot
-            self._generate_plot(writer)
-        
-        print(f"Report generated: {self.report_filename}")
-
-    def _generate_plot(self, writer):
-        """Creates a probability vs. returns plot with VaR points and embeds it in the Excel file."""
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        # Plot all daily returns
-        for asset in self.returns.columns:
-            ax.plot(self.returns.index, self.returns[asset], label=asset, alpha=0.6)
-        
+        """
+        Generates an Excel report with VaR results and a plot.
+
+        The workbook is written in xlsxwriter's constant-memory mode: rows are streamed
+        to disk as they are written, so memory does not grow with the size of the
+        returns table. The plot is rendered into an in-memory PNG.
+
+        :return: Path of the workbook.
+        """
+        if self.report_filename is None:
+            self.report_filename = reserve_report_path(self.output_dir)
+
+        workbook = xlsxwriter.Workbook(
+            self.report_filename, {"constant_memory": True, "nan_inf_to_errors": True, "remove_timezone": True}
+        )
+        try:
+            sidecar_path = self._sidecar_path() if self._needs_sidecar() else None
+
+            summary = workbook.add_worksheet("Summary")
+            rows = [
+                ("Parameter", "Value"),
+                ("Assets", ", ".join(self.assets)),
+                ("Start Date", str(self.start_date)),
+                ("End Date", str(self.end_date)),
+                ("Confidence Level", f"{self.confidence_level * 100}%"),
+                ("Selected Methods", ", ".join(self.selected_methods)),
+            ]
+            if sidecar_path is not None:
+                rows.append(("Daily Returns", sidecar_path))
+            for row, values in enumerate(rows):
+                summary.write_row(row, 0, values)
+            summary.insert_image("E5", "VaR_Plot.png", {"image_data": self._render_plot()})
+
+            var_sheet = workbook.add_worksheet("VaR Results")
+            var_sheet.write_row(0, 0, ("Method", "VaR"))
+            for row, (method, var) in enumerate(self._clean_var_results().items(), start=1):
+                var_sheet.write(row, 0, method)
+                if var is not None:
+                    var_sheet.write_number(row, 1, float(var))
+
+            if sidecar_path is not None:
+                self._write_sidecar(sidecar_path)
+                workbook.add_worksheet("Daily Returns").write(0, 0, f"Daily returns written to {sidecar_path}")
+            else:
+                self._stream_returns(workbook, workbook.add_worksheet("Daily Returns"))
+        finally:
+            workbook.close()
+
+        logger.info("Report generated: %s", self.report_filename)
+        return self.report_filename
+
+    def _needs_sidecar(self):
+        rows, columns = self.returns.shape
+        return (
+            rows * columns > self.max_excel_cells
+            or rows + 1 > EXCEL_MAX_ROWS
+            or columns + 1 > EXCEL_MAX_COLUMNS
+        )
+
+    def _sidecar_path(self):
+        return f"{os.path.splitext(self.report_filename)[0]}_daily_returns.{self.sidecar_format}"
+
+    def _write_sidecar(self, path):
+        """Write the full returns table in a columnar (Parquet) or CSV file."""
+        if self.sidecar_format == "parquet":
+            frame = self.returns.copy(deep=False)
+            frame.columns = [str(column) for column in frame.columns]
+            frame.to_parquet(path)
+        else:
+            self.returns.to_csv(path, chunksize=self.chunk_size)
+        logger.info("Daily returns written to sidecar %s", path)
+
+    def _stream_returns(self, workbook, worksheet):
+        """Stream the returns table row by row, converting one chunk of rows at a time."""
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        worksheet.write(0, 0, self.returns.index.name or "Date")
+        worksheet.write_row(0, 1, [str(column) for column in self.returns.columns])
+
+        is_datetime = isinstance(self.returns.index, pd.DatetimeIndex)
+        for start in range(0, len(self.returns), self.chunk_size):
+            chunk = self.returns.iloc[start:start + self.chunk_size]
+            dates = chunk.index.to_pydatetime() if is_datetime else chunk.index.tolist()
+            for offset, (date, values) in enumerate(zip(dates, chunk.to_numpy(dtype=float).tolist())):
+                row = start + offset + 1
+                if is_datetime:
+                    worksheet.write_datetime(row, 0, date, date_format)
+                else:
+                    worksheet.write(row, 0, date)
+                worksheet.write_row(row, 1, values)
+
+    def _render_plot(self):
+        """
+        Creates a probability vs. returns plot with VaR points, rendered in memory.
+
+        Uses the object-oriented Figure API with the Agg canvas: no pyplot global state,
+        no GUI backend and no temporary file.
+        """
+        fig = Figure(figsize=(10, 5))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+
+        # Plot all daily returns (or their average for very wide portfolios)
+        if len(self.returns.columns) <= self.max_plotted_assets:
+            for asset in self.returns.columns:
+                ax.plot(self.returns.index, self.returns[asset], label=asset, alpha=0.6)
+        else:
+            ax.plot(self.returns.index, self.returns.mean(axis=1), label="Equal-weight average", alpha=0.6)
+
         # Highlight VaR points
         colors = ["red", "blue", "green", "orange", "purple"]
-        for i, (method, var_value) in enumerate(self.var_results.items()):
-            if isinstance(var_value, dict):  # Extract only the "var" key
-                var_value = var_value.get("var", None)
+        for i, (method, var_value) in enumerate(self._clean_var_results().items()):
             if var_value is not None:
                 ax.axhline(-var_value, color=colors[i % len(colors)], linestyle='--', label=f"{method} VaR")
 
@@ -71,10 +202,65 @@ class ReportGenerator:
         ax.set_title("Daily Returns and VaR Levels")
         ax.legend()
 
-        # Save and embed the plot
-        plot_filename = "VaR_Plot.png"
-        plt.savefig(plot_filename)
-        plt.close()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        buffer.seek(0)
+        return buffer
+
+
+def _generate_one(parameters):
+    """
+    Build and write one report (module-level so that worker processes can run it).
+    """
+    return ReportGenerator(**parameters).generate_report()
+
+
+def generate_reports(portfolios, output_dir=".", max_workers=None, stem_template="VaR_Report_{name}_{date}"):
+    """
+    Generate one workbook per portfolio, concurrently in a process pool.
+
+    Plots use the object-oriented Figure API (no shared pyplot state), so reports
+    render independently in each worker and the batch scales with the cores.
+
+    :param portfolios: Dictionary {portfolio name: ReportGenerator keyword arguments}
+                       (assets, start_date, end_date, confidence_level, selected_methods,
+                       var_results, returns, ...).
+    :param output_dir: Directory of the reports.
+    :param max_workers: Number of worker processes (default: CPU count; 1 runs in-process).
+    :param stem_template: File name template, formatted with `name` and `date`; paths are
+                          reserved up front and never collide with existing files.
+    :return: Tuple (paths, errors), dictionaries indexed by portfolio name.
+    """
+    date = datetime.date.today()
+    jobs, reserved = {}, set()
+    for name, parameters in portfolios.items():
+        parameters = dict(parameters)
+        if parameters.get("report_filename") is None:
+            parameters["report_filename"] = reserve_report_path(output_dir, stem_template.format(name=name, date=date))
+            reserved.add(name)
+        jobs[name] = parameters
+
+    paths, errors = {}, {}
+    if max_workers == 1:
+        for name, parameters in jobs.items():
+            try:
+                paths[name] = _generate_one(parameters)
+            except Exception as error:
+                errors[name] = error
+    else:
+        with ProcessPoolExecutor(max_workers) as pool:
+            futures = {pool.submit(_generate_one, parameters): name for name, parameters in jobs.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    paths[name] = future.result()
+                except Exception as error:
+                    errors[name] = error
+
+    for name, error in errors.items():
+        logger.error("Report generation failed for %s: %s", name, error)
+        # Do not leave a partial workbook behind under a reserved name
+        if name in reserved and os.path.exists(jobs[name]["report_filename"]):
+            os.remove(jobs[name]["report_filename"])
 
-        worksheet = writer.sheets["Summary"]
-        worksheet.insert_image("E5", plot_filename)
+    return {name: paths[name] for name in portfolios if name in paths}, errors
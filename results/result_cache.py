@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Returned by ResultCache.get on a miss (None is a valid cached result)
+MISSING = object()
+
+
+def data_fingerprint(data):
+    """
+    Content hash of a returns table (values, dates and columns).
+
+    Two tables with the same content have the same fingerprint, whatever their origin
+    (download, price cache, memory-mapped store); any changed value gives a new one.
+    """
+    digest = hashlib.sha256()
+    values = np.ascontiguousarray(np.asarray(data, dtype=float))
+    digest.update(str(values.shape).encode())
+    digest.update(values.tobytes())
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(data.index, index=False).to_numpy().tobytes())
+    if isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([str(column) for column in data.columns]).encode())
+    return digest.hexdigest()
+
+
+def method_parameters(instance):
+    """
+    Scalar configuration of a VaR method instance (confidence level, number of paths,
+    seed, ...), used to tell apart results of differently configured methods.
+    """
+    parameters = {"class": f"{type(instance).__module__}.{type(instance).__qualname__}"}
+    for name, value in vars(instance).items():
+        if name.startswith("_"):
+            continue
+        if isinstance(value, np.generic):
+            value = value.item()
+        if value is None or isinstance(value, (bool, int, float, str)):
+            parameters[name] = value
+    return parameters
+
+
+class ResultCache:
+    """
+    Persistent memoization of results in a SQLite database.
+
+    Entries are keyed by a hash of the data fingerprint, the kind of result ("var",
+    "backtesting", ...), the method name and its parameters. Each entry also records
+    a scope (e.g. assets and date range): storing a result computed on new data for a
+    scope drops the entries computed on the previous data of that scope. The total
+    size of the stored results is bounded, least recently used entries being evicted
+    first.
+
+    Each operation opens its own connection, so the cache can be shared by threads
+    and by the worker processes of the batch runner.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 ** 2):
+        """
+        :param path: SQLite database file (created if needed).
+        :param max_bytes: Maximal total size of the pickled results.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    data_hash TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_scope ON results (scope)")
+            connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        """Connection committed on success, rolled back on error, and always closed."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def key(data_hash, kind, method, parameters=None):
+        """
+        Cache key of one result.
+
+        :param data_hash: Fingerprint of the input data (see `data_fingerprint`).
+        :param kind: Kind of result ("var", "backtesting", ...).
+        :param method: Method name.
+        :param parameters: JSON-serializable parameters of the computation.
+        """
+        payload = json.dumps([data_hash, kind, method, parameters], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Cached result for this key, or MISSING.
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return MISSING
+            connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, key, value, data_hash, scope=""):
+        """
+        Store a result, invalidating the entries computed on other data for the same scope.
+
+        :param scope: Identifier of what the data describes (assets, dates, source...).
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            logger.warning("Result too large for the cache (%d bytes), not stored", len(blob))
+            return
+
+        with self._connect() as connection:
+            self._invalidate(connection, scope, data_hash)
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, scope, data_hash, value, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, data_hash, blob, len(blob), time.time()),
+            )
+            self._evict(connection)
+
+    def invalidate(self, scope, data_hash):
+        """
+        Drop the entries computed on other data than `data_hash` for this scope, e.g. once
+        results for new data were produced outside the cache.
+        """
+        with self._connect() as connection:
+            self._invalidate(connection, scope, data_hash)
+
+    @staticmethod
+    def _invalidate(connection, scope, data_hash):
+        invalidated = connection.execute(
+            "DELETE FROM results WHERE scope = ? AND data_hash != ?", (scope, data_hash)
+        ).rowcount
+        if invalidated:
+            logger.info("Invalidated %d cached results after a data change", invalidated)
+
+    def _evict(self, connection):
+        """Delete least recently used entries until the total size fits in max_bytes."""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.debug("Evicted %d cached results", evicted)
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results")
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
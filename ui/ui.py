@@ -1,7 +1,12 @@
+import logging
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
 
+logger = logging.getLogger(__name__)
+
 class ScrollableFrame(ttk.Frame):
     """
     Scrollable frame to handle large content that doesn't fit in the window.
@@ -81,6 +86,13 @@ class VaRUI:
         self.scrollable_frame = ScrollableFrame(self.root)
         self.scrollable_frame.pack(fill="both", expand=True)
 
+        # Background computation: the worker thread posts (kind, payload) messages that
+        # the Tk event loop drains, so widgets are only ever touched from the main thread.
+        self.messages = queue.Queue()
+        self.worker = None
+        self.cancel_event = None
+        self.summary = None
+
         self.create_widgets()
 
     def create_widgets(self):
@@ -139,6 +151,7 @@ class VaRUI:
             "GARCH",
             "TVE",
             "TVE-GARCH",
+            "Monte-Carlo",
             "Optimal-VaR",
         ]
         self.var_method_vars = {method: tk.BooleanVar() for method in self.var_methods}
@@ -164,6 +177,27 @@ class VaRUI:
         launch_button = tk.Button(action_frame, text="Run Full Program", command=self.run_full_program)
         launch_button.pack(side="left", padx=5, pady=5)
 
+        self.cancel_button = tk.Button(action_frame, text="Cancel", command=self.cancel_task, state="disabled")
+        self.cancel_button.pack(side="left", padx=5, pady=5)
+
+        # Disabled while a computation runs in the background
+        self.task_buttons = [calculate_button, generate_report_button, launch_button]
+
+        # Progress and partial results (methods are listed as soon as they finish)
+        progress_frame = tk.LabelFrame(container, text="Progress", padx=10, pady=10)
+        progress_frame.pack(fill="x", padx=10, pady=5)
+
+        self.status_label = tk.Label(progress_frame, text="Ready", anchor="w")
+        self.status_label.pack(fill="x", padx=5, pady=2)
+
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+        self.progress_bar.pack(fill="x", padx=5, pady=2)
+
+        self.results_tree = ttk.Treeview(progress_frame, columns=("method", "var", "status"), show="headings", height=6)
+        for column, heading in (("method", "Method"), ("var", "VaR"), ("status", "Status")):
+            self.results_tree.heading(column, text=heading)
+        self.results_tree.pack(fill="x", padx=5, pady=5)
+
     def add_asset(self):
         selected_company = self.asset_combo.get()
         if selected_company:
@@ -224,67 +258,184 @@ class VaRUI:
 
         return selected_methods
 
-    def calculate_var(self):
+    def read_calculation_inputs(self):
+        """
+        Lit et valide toutes les entrées ; enregistre les paramètres dans le contrôleur.
+        """
         start_date, end_date, selected_assets = self.get_user_inputs()
         confidence_level = self.get_confidence_level()
         selected_methods = self.get_var_methods()
 
-        print(f"Selected methods: {selected_methods}")  # Debugging line
+        logger.debug("Selected methods: %s", selected_methods)
 
         if not (start_date and end_date and selected_assets and confidence_level and selected_methods):
-            return
+            return False
 
         self.controller.start_date = start_date
         self.controller.end_date = end_date
         self.controller.assets = selected_assets
         self.controller.confidence_level = confidence_level
-        self.controller.selected_methods = selected_methods  # <-- FIX: Store selected methods
+        self.controller.selected_methods = selected_methods
+        return True
 
-        self.controller.fetch_data()
-        self.controller.initialize_var_methods()  # <-- Now selected_methods will exist
-
-        res = self.controller.calculate_var()
-        print(f"Calculation result: {res}")  # Debugging line
-
-        messagebox.showinfo("Calculation Complete", "VaR calculations completed successfully!")
+    def calculate_var(self):
+        if not self.read_calculation_inputs():
+            return
 
-        
+        # fetch + initialisation + une étape par méthode
+        self.start_task(self._calculate_steps, total_steps=2 + len(self.controller.selected_methods))
 
     def generate_report(self):
         if not self.controller.var_results:
             messagebox.showwarning("Error", "Please calculate the VaR before generating a report.")
             return
 
-        self.controller.perform_backtesting()
         report_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("xlsx files", "*.xlsx")])
         if report_path:
-            self.controller.generate_reports()
-            messagebox.showinfo("Report Generated", f"Report saved to {report_path}")
+            self.controller.report_filename = report_path
+            self.start_task(self._report_steps, total_steps=2)
 
     def run_full_program(self):
         """
         Méthode pour lancer l'exécution complète du programme depuis l'interface graphique.
         """
-        start_date, end_date, selected_assets = self.get_user_inputs()
-        confidence_level = self.get_confidence_level()
-        selected_methods = self.get_var_methods()
+        if not self.read_calculation_inputs():
+            return
 
-        if not (start_date and end_date and selected_assets and confidence_level and selected_methods):
+        # Each run gets a fresh collision-free report name
+        self.controller.report_filename = None
+        self.start_task(self._full_program_steps, total_steps=4 + len(self.controller.selected_methods))
+
+    # --- Background execution -------------------------------------------------
+
+    def start_task(self, steps, total_steps):
+        """
+        Run `steps` in a daemon worker thread; the UI stays responsive and can cancel it.
+        """
+        if self.worker is not None and self.worker.is_alive():
             return
 
-        self.controller.start_date = start_date
-        self.controller.end_date = end_date
-        self.controller.assets = selected_assets
-        self.controller.confidence_level = confidence_level
+        self.cancel_event = threading.Event()
+        for button in self.task_buttons:
+            button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(maximum=total_steps, value=0)
+
+        self.worker = threading.Thread(target=self._run_task, args=(steps,), daemon=True)
+        self.worker.start()
+        self.root.after(100, self.poll_messages)
+
+    def cancel_task(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="Cancelling...")
+
+    def _run_task(self, steps):
+        """Worker thread body: never touches Tk widgets, only posts messages."""
+        try:
+            for message in steps():
+                self.messages.put(("progress", message))
+                if self.cancel_event.is_set():
+                    self.messages.put(("cancelled", None))
+                    return
+        except Exception as error:
+            logger.exception("Background task failed")
+            self.messages.put(("failed", error))
+            return
+        self.messages.put(("cancelled" if self.cancel_event.is_set() else "done", None))
 
-        # Exécution complète du programme
+    def _post_method_result(self, method, var, error):
+        self.messages.put(("result", (method, var, error)))
+
+    def _calculate_steps(self):
+        """Generator of the calculation stages; yields a status message after each one."""
+        self.messages.put(("status", "Fetching market data..."))
         self.controller.fetch_data()
+        yield "Market data loaded"
+
         self.controller.initialize_var_methods()
-        self.controller.calculate_var()
+        self.messages.put(("methods", list(self.controller.var_methods)))
+        yield "Calculating VaR..."
+
+        # Per-method results (and progress) are posted as methods finish, fastest first
+        self.controller.calculate_var(on_result=self._post_method_result, cancel_event=self.cancel_event)
+        self.messages.put(("summary", "VaR calculations completed successfully!"))
+
+    def _report_steps(self):
+        self.messages.put(("status", "Backtesting..."))
         self.controller.perform_backtesting()
-        self.controller.generate_reports()
+        yield "Generating report..."
+
+        report_path = self.controller.generate_reports()
+        yield "Report generated"
+        self.messages.put(("summary", f"Report saved to {report_path}"))
+
+    def _full_program_steps(self):
+        yield from self._calculate_steps()
+        yield from self._report_steps()
+        self.messages.put(("summary", "Full program run completed! Reports generated successfully."))
 
-        messagebox.showinfo("Success", "Full program run completed! Reports generated successfully.")
+    def poll_messages(self):
+        """
+        Drain the worker's messages in the Tk event loop and update the widgets.
+        """
+        finished = False
+        while True:
+            try:
+                kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "status":
+                self.status_label.config(text=payload)
+            elif kind == "progress":
+                self.status_label.config(text=payload)
+                self.progress_bar.step(1)
+            elif kind == "methods":
+                self.results_tree.delete(*self.results_tree.get_children())
+                for method in payload:
+                    self.results_tree.insert("", tk.END, iid=method, values=(method, "", "running"))
+            elif kind == "result":
+                method, var, error = payload
+                if error is not None:
+                    values = (method, "", "cancelled" if self.cancel_event.is_set() else f"error: {error}")
+                else:
+                    values = (method, self._format_var(var), "done")
+                if self.results_tree.exists(method):
+                    self.results_tree.item(method, values=values)
+                self.progress_bar.step(1)
+            elif kind == "summary":
+                self.summary = payload
+            elif kind == "done":
+                finished = True
+                self.status_label.config(text="Done")
+                messagebox.showinfo("Success", self.summary or "Completed.")
+            elif kind == "cancelled":
+                finished = True
+                self.status_label.config(text="Cancelled")
+                for method in self.results_tree.get_children():
+                    if self.results_tree.set(method, "status") == "running":
+                        self.results_tree.set(method, "status", "cancelled")
+            elif kind == "failed":
+                finished = True
+                self.status_label.config(text="Failed")
+                messagebox.showerror("Error", str(payload))
+
+        if finished:
+            for button in self.task_buttons:
+                button.config(state="normal")
+            self.cancel_button.config(state="disabled")
+            self.summary = None
+        else:
+            self.root.after(100, self.poll_messages)
+
+    @staticmethod
+    def _format_var(var):
+        try:
+            return f"{float(var):.6f}"
+        except (TypeError, ValueError):
+            return str(var)
 
     def run(self):
         self.root.mainloop()